@@ -0,0 +1,212 @@
+"""
+Benchmark the scraping functions against the local fixture server.
+
+Runs each function on headless Chrome at several fixture sizes and reports
+wall time, WebDriver round-trips (commands sent to chromedriver) and items
+per second, without touching the real sites.
+
+    python benchmark_scrapers.py --sizes 100 1000 10000
+    python benchmark_scrapers.py --functions extract_messages harvest_member_list --json results.json
+
+Note that scrape_engagement_by_hover still sleeps for seconds per post, so
+its larger sizes take a long time.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import importlib.util
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from fixture_server import start_fixture_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIXTURE_GUILD = "900000000000000001"
+FIXTURE_CHANNEL = "900000000000000002"
+
+
+def load_script(name, relative_path):
+    """Import one of the scraper scripts by path (they aren't packages)."""
+    # Let the script import the modules next to it
+    sys.path.insert(0, os.path.join(ROOT, os.path.dirname(relative_path)))
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+discord_scrapper = load_script("discord_scrapper", os.path.join("Discord", "discord_scrapper.py"))
+instagram_scrapper = load_script("instagram_scrapper", os.path.join("Instagram", "instagram_scrapper.py"))
+
+
+def make_driver():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1280,900")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
+
+
+def count_round_trips(driver):
+    """
+    Wrap the driver's command executor so every command sent to chromedriver
+    is counted. Returns a one-element list holding the running count.
+    """
+    counter = [0]
+    execute = driver.command_executor.execute
+
+    def counting_execute(command, params):
+        counter[0] += 1
+        return execute(command, params)
+
+    driver.command_executor.execute = counting_execute
+    return counter
+
+
+def discord_url(base_url, size):
+    return f"{base_url}/discord/channels/{FIXTURE_GUILD}/{FIXTURE_CHANNEL}?n={size}"
+
+
+def instagram_url(base_url, size):
+    return f"{base_url}/instagram/fixture_user/?n={size}"
+
+
+# Each bench gets (driver, base_url, size) and returns (setup, run): setup
+# prepares the page untimed, run does the timed call and returns the item count.
+
+def bench_extract_messages(driver, base_url, size):
+    url = discord_url(base_url, size)
+
+    def run():
+        server_info = {"messages": []}
+        discord_scrapper.extract_messages(driver, server_info, [url], backfill=True)
+        return len(server_info["messages"])
+
+    return (lambda: None), run
+
+
+def bench_extract_groups_and_online_members(driver, base_url, size):
+    def setup():
+        driver.get(discord_url(base_url, size))
+
+    def run():
+        result = discord_scrapper.extract_groups_and_online_members(driver, FIXTURE_GUILD, target_group="Online")
+        return len(result["online_members"])
+
+    return setup, run
+
+
+def bench_harvest_member_list(driver, base_url, size):
+    def setup():
+        driver.get(discord_url(base_url, size))
+
+    def run():
+        _, last_active = discord_scrapper.harvest_member_list(driver, FIXTURE_GUILD, target_group="Online")
+        return len(last_active)
+
+    return setup, run
+
+
+def bench_scroll_to_load_posts(driver, base_url, size):
+    def setup():
+        driver.get(instagram_url(base_url, size))
+
+    def run():
+        return len(instagram_scrapper.scroll_to_load_posts(driver, size))
+
+    return setup, run
+
+
+def bench_scrape_engagement_by_hover(driver, base_url, size):
+    posts = []
+
+    def setup():
+        driver.get(instagram_url(base_url, size))
+        posts[:] = instagram_scrapper.scroll_to_load_posts(driver, size)
+        driver.execute_script("window.scrollTo(0, 0);")
+
+    def run():
+        return len(instagram_scrapper.scrape_engagement_by_hover(driver, posts))
+
+    return setup, run
+
+
+def bench_scrape_engagement_over_http(driver, base_url, size):
+    posts = []
+
+    def setup():
+        driver.get(instagram_url(base_url, size))
+        posts[:] = instagram_scrapper.scroll_to_load_posts(driver, size)
+
+    def run():
+        return len(instagram_scrapper.scrape_engagement_over_http(driver, posts, base_url=base_url))
+
+    return setup, run
+
+
+BENCHMARKS = {
+    "extract_messages": bench_extract_messages,
+    "extract_groups_and_online_members": bench_extract_groups_and_online_members,
+    "harvest_member_list": bench_harvest_member_list,
+    "scroll_to_load_posts": bench_scroll_to_load_posts,
+    "scrape_engagement_by_hover": bench_scrape_engagement_by_hover,
+    "scrape_engagement_over_http": bench_scrape_engagement_over_http,
+}
+
+
+def run_benchmarks(functions, sizes):
+    server = start_fixture_server()
+    host, port = server.server_address[:2]
+    base_url = f"http://{host}:{port}"
+
+    driver = make_driver()
+    round_trips = count_round_trips(driver)
+    results = []
+
+    try:
+        for name in functions:
+            for size in sizes:
+                setup, run = BENCHMARKS[name](driver, base_url, size)
+                setup()
+
+                round_trips[0] = 0
+                started = time.perf_counter()
+                items = run()
+                elapsed = time.perf_counter() - started
+
+                result = {
+                    "function": name,
+                    "size": size,
+                    "items": items,
+                    "seconds": round(elapsed, 3),
+                    "round_trips": round_trips[0],
+                    "items_per_second": round(items / elapsed, 2) if elapsed else 0,
+                }
+                results.append(result)
+                print(f"{name:<36} size={size:<6} items={items:<6} "
+                      f"time={result['seconds']:>9.3f}s round_trips={result['round_trips']:<7} "
+                      f"items/s={result['items_per_second']}")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local fixtures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--functions", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.functions, args.sizes)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f"Results saved to {args.json}")
@@ -0,0 +1,344 @@
+"""
+Local stand-in for the Discord and Instagram pages the scrapers read.
+
+Serves synthetic HTML that mimics the parts of both sites the scrapers depend
+on: Discord's virtualized chat and member lists (older history fetched on
+scroll-to-top, rows rendered only around the viewport) and Instagram's
+profile grid (posts appended in batches on scroll, hover overlays with like
+and comment counts). Everything is generated from the item count in the URL,
+so no captured data or network access is needed.
+
+    python fixture_server.py --port 8765
+
+    http://127.0.0.1:8765/discord/channels/<guild>/<channel>?n=1000
+    http://127.0.0.1:8765/instagram/<user>/?n=1000
+    http://127.0.0.1:8765/api/v1/media/<media id>/info/
+
+The last one stands in for Instagram's media-info API, which the
+browserless post fetcher calls; it serves the fixture grid's posts.
+"""
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# One transparent pixel, served for every fake CDN attachment
+PIXEL_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01"
+    b"\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+DISCORD_PAGE = """<!DOCTYPE html>
+<html><head><title>Fixture guild</title>
+<style>
+body { margin: 0; font-family: sans-serif; display: flex; height: 100vh; }
+nav { width: 220px; overflow: auto; }
+main { flex: 1; display: flex; flex-direction: column; }
+.scroller_chat { flex: 1; overflow-y: auto; }
+ol { list-style: none; margin: 0; padding: 0; }
+li[id^='chat-messages-'] { min-height: 48px; }
+.members_wrap { width: 240px; display: none; }
+.scrollerBase_m { height: 100vh; overflow-y: auto; position: relative; }
+.row { position: absolute; left: 0; right: 0; height: 44px; }
+</style></head>
+<body>
+<nav aria-label="Fixture guild (server)">
+  <ul aria-label="Channels">
+    <li data-dnd-name="Text Channels" draggable="true">Text Channels</li>
+    <li data-dnd-name="general"><a href="/discord/channels/__GUILD__/__CHANNEL__?n=__N__" data-list-item-id="channels___CHANNEL__">general</a></li>
+  </ul>
+</nav>
+<main>
+  <div id="chat-messages-__GUILD__-header"><h3>Welcome to\nFixture guild</h3></div>
+  <div aria-label="Show Member List" role="button" onclick="showMembers()">Members</div>
+  <div class="scroller_chat" id="chat-scroller"><ol data-list-id="chat-messages"></ol></div>
+</main>
+<div class="members_wrap" id="members-wrap">
+  <div class="scrollerBase_m" data-list-id="members-__GUILD__"><div id="members-inner"></div></div>
+</div>
+<script>
+var TOTAL = __N__;
+var GUILD = "__GUILD__";
+var CHANNEL = "__CHANNEL__";
+var BASE_SNOWFLAKE = 1100000000000000000;
+var BASE_TIME = Date.UTC(2023, 0, 1);
+var PAGE = 50;
+var MAX_RENDERED = 150;
+var FETCH_DELAY = 120;
+
+// --- Chat list: newest PAGE messages first, older pages fetched on scroll-to-top ---
+var chatScroller = document.getElementById("chat-scroller");
+var chatList = chatScroller.querySelector("ol");
+var first = Math.max(0, TOTAL - PAGE);
+var last = TOTAL;
+var fetching = false;
+
+function messageHtml(i) {
+    var snowflake = String(BASE_SNOWFLAKE + i);
+    var stamp = new Date(BASE_TIME + i * 60000).toISOString();
+    var attachment = i % 10 === 0
+        ? '<img src="/cdn.discordapp.com/attachments/' + CHANNEL + '/' + i + '.gif">'
+        : "";
+    return '<li id="chat-messages-' + CHANNEL + '-' + snowflake + '" class="messageListItem_f">'
+        + '<div><h3 class="header_f"><span id="message-username-' + snowflake + '" class="username_f">user'
+        + (i % 37) + '</span> <time datetime="' + stamp + '" aria-label="' + stamp + '">' + stamp + '</time></h3>'
+        + '<div id="message-content.' + snowflake + '" class="messageContent_f">Fixture message number ' + i + '</div>'
+        + attachment + '</div></li>';
+}
+
+function renderChat() {
+    var html = "";
+    for (var i = first; i < last; i++) html += messageHtml(i);
+    chatList.innerHTML = html;
+}
+
+chatScroller.addEventListener("scroll", function () {
+    if (fetching || chatScroller.scrollTop > 200 || first === 0) return;
+    fetching = true;
+    setTimeout(function () {
+        var previousHeight = chatScroller.scrollHeight;
+        first = Math.max(0, first - PAGE);
+        last = Math.min(last, first + MAX_RENDERED);
+        renderChat();
+        chatScroller.scrollTop += chatScroller.scrollHeight - previousHeight;
+        fetching = false;
+    }, FETCH_DELAY);
+});
+
+renderChat();
+chatScroller.scrollTop = chatScroller.scrollHeight;
+
+// --- Member list: fixed-height rows rendered only around the viewport ---
+var ROW_HEIGHT = 44;
+var OVERSCAN = 10;
+var rows = [];
+var groups = [
+    ["member", Math.floor(TOTAL * 0.3)],
+    ["Online", Math.floor(TOTAL * 0.3)],
+    ["Offline", TOTAL - 2 * Math.floor(TOTAL * 0.3)]
+];
+var memberIndex = 0;
+groups.forEach(function (group) {
+    if (group[1] <= 0) return;
+    rows.push({header: group[0] + " — " + group[1] + " members"});
+    for (var j = 0; j < group[1]; j++) {
+        var status = group[0] === "Offline" ? "offline" : ["online", "idle", "dnd"][memberIndex % 3];
+        rows.push({id: "members-" + GUILD + "-" + (2000000 + memberIndex), name: "member" + memberIndex, status: status});
+        memberIndex++;
+    }
+});
+
+var memberScroller = document.querySelector("[data-list-id='members-" + GUILD + "']");
+var memberInner = document.getElementById("members-inner");
+memberInner.style.height = (rows.length * ROW_HEIGHT) + "px";
+memberInner.style.position = "relative";
+
+function renderMembers() {
+    var start = Math.max(0, Math.floor(memberScroller.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    var end = Math.min(rows.length, Math.ceil((memberScroller.scrollTop + memberScroller.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    var html = "";
+    for (var k = start; k < end; k++) {
+        var row = rows[k];
+        var top = 'style="top:' + (k * ROW_HEIGHT) + 'px"';
+        if (row.header) {
+            html += '<h3 class="membersGroup_f row" ' + top + '>' + row.header + '</h3>';
+        } else {
+            html += '<div class="member_f row ' + row.status + '" data-list-item-id="' + row.id + '" ' + top + '>'
+                + '<span class="username_f">' + row.name + '</span></div>';
+        }
+    }
+    memberInner.innerHTML = html;
+}
+
+var renderQueued = false;
+memberScroller.addEventListener("scroll", function () {
+    if (renderQueued) return;
+    renderQueued = true;
+    setTimeout(function () { renderQueued = false; renderMembers(); }, 16);
+});
+
+function showMembers() {
+    var wrap = document.getElementById("members-wrap");
+    wrap.style.display = wrap.style.display === "block" ? "none" : "block";
+    renderMembers();
+}
+</script>
+</body></html>
+"""
+
+INSTAGRAM_PAGE = """<!DOCTYPE html>
+<html><head><title>__USER__ - Instagram fixture</title>
+<style>
+body { margin: 0; font-family: sans-serif; }
+header { height: 220px; }
+#grid { display: grid; grid-template-columns: repeat(3, 300px); gap: 4px; }
+#grid a { display: block; width: 300px; height: 300px; background: #ddd; position: relative; }
+.overlay { position: absolute; inset: 0; background: rgba(0,0,0,.4); color: #fff; list-style: none; margin: 0; }
+</style></head>
+<body>
+<header>
+  <img alt="__USER__'s profile picture" src="/cdn.instagram.fixture/avatar.gif">
+  <h2>__USER__</h2>
+  <span class="_ap3a _aaco _aacu _aacx _aad7 _aade">Synthetic fixture profile</span>
+  <ul>
+    <li><span class="xdj266r">__N__</span> posts</li>
+    <li><span class="xdj266r">1.2M</span> followers</li>
+    <li><span class="xdj266r">321</span> following</li>
+  </ul>
+  <div><span class="xdj266r">Home</span><span class="xdj266r">Search</span><span class="xdj266r">Reels</span></div>
+</header>
+<div id="grid"></div>
+<script>
+var TOTAL = __N__;
+var BATCH = 12;
+var LOAD_DELAY = 300;
+var grid = document.getElementById("grid");
+var loaded = 0;
+var loading = false;
+
+function countText(value) {
+    if (value >= 1000000) return (value / 1000000).toFixed(1) + "M";
+    if (value >= 10000) return (value / 1000).toFixed(1) + "K";
+    return value.toLocaleString("en-US");
+}
+
+function loadBatch() {
+    var end = Math.min(TOTAL, loaded + BATCH);
+    for (var i = loaded; i < end; i++) {
+        var a = document.createElement("a");
+        a.href = "/p/FX" + i.toString(36).toUpperCase() + "/";
+        a.dataset.likes = countText(1000 + i * 37);
+        a.dataset.comments = countText(10 + i % 90);
+        a.addEventListener("mouseenter", function () {
+            var overlay = document.createElement("ul");
+            overlay.className = "overlay";
+            overlay.innerHTML = '<li><span class="xdj266r">' + this.dataset.likes + '</span></li>'
+                + '<li><span class="xdj266r">' + this.dataset.comments + '</span></li>';
+            this.appendChild(overlay);
+        });
+        a.addEventListener("mouseleave", function () {
+            var overlay = this.querySelector(".overlay");
+            if (overlay) overlay.remove();
+        });
+        grid.appendChild(a);
+    }
+    loaded = end;
+}
+
+window.addEventListener("scroll", function () {
+    if (loading || loaded >= TOTAL) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 600) return;
+    loading = true;
+    setTimeout(function () { loadBatch(); loading = false; }, LOAD_DELAY);
+});
+
+loadBatch();
+</script>
+</body></html>
+"""
+
+
+SHORTCODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+# Same epoch as the Discord fixture's messages (2023-01-01 UTC)
+BASE_TIMESTAMP = 1672531200
+
+
+def media_id_to_shortcode(media_id):
+    shortcode = ""
+    while media_id:
+        media_id, digit = divmod(media_id, 64)
+        shortcode = SHORTCODE_ALPHABET[digit] + shortcode
+    return shortcode
+
+
+def media_info(media_id):
+    """
+    The API's response for one grid post ("/p/FX<base36 index>/"), with the
+    counts the grid's hover overlay shows. None for unknown ids.
+    """
+    shortcode = media_id_to_shortcode(media_id)
+    if not shortcode.startswith("FX"):
+        return None
+    try:
+        index = int(shortcode[2:], 36)
+    except ValueError:
+        return None
+    return {
+        "items": [{
+            "code": shortcode,
+            "like_count": 1000 + index * 37,
+            "comment_count": 10 + index % 90,
+            "taken_at": BASE_TIMESTAMP + index * 86400,
+        }],
+        "status": "ok",
+    }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse their connections
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        count = int(query.get("n", ["100"])[0])
+        parts = [part for part in url.path.split("/") if part]
+
+        if "cdn.discordapp.com" in parts or "cdn.instagram.fixture" in parts:
+            self.respond(PIXEL_GIF, "image/gif")
+        elif parts[:2] == ["discord", "channels"] and len(parts) >= 3:
+            guild = parts[2]
+            channel = parts[3] if len(parts) > 3 else "1"
+            page = (DISCORD_PAGE
+                    .replace("__GUILD__", guild)
+                    .replace("__CHANNEL__", channel)
+                    .replace("__N__", str(count)))
+            self.respond(page.encode("utf-8"), "text/html; charset=utf-8")
+        elif parts[:1] == ["instagram"] and len(parts) == 2:
+            page = INSTAGRAM_PAGE.replace("__USER__", parts[1]).replace("__N__", str(count))
+            self.respond(page.encode("utf-8"), "text/html; charset=utf-8")
+        elif parts[:3] == ["api", "v1", "media"] and len(parts) == 5 and parts[3].isdigit():
+            info = media_info(int(parts[3]))
+            if info is None:
+                self.send_error(404)
+            else:
+                self.respond(json.dumps(info).encode("utf-8"), "application/json")
+        else:
+            self.send_error(404)
+
+    def respond(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(host="127.0.0.1", port=0):
+    """
+    Start the fixture server on a background thread and return it. Use
+    port=0 to pick a free port; the bound address is server.server_address.
+    """
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic Discord/Instagram fixture pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), FixtureHandler)
+    print(f"Serving fixtures on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
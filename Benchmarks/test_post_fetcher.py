@@ -0,0 +1,91 @@
+"""
+Tests for Instagram/post_fetcher.py against the local fixture server.
+
+Run from the Benchmarks folder:
+
+    python -m pytest test_post_fetcher.py
+"""
+import os
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from fixture_server import BASE_TIMESTAMP, FixtureHandler, start_fixture_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Instagram"))
+from post_fetcher import fetch_post_metadata
+
+
+def fixture_post_url(index):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    code = ""
+    while True:
+        index, digit = divmod(index, 36)
+        code = digits[digit] + code
+        if not index:
+            break
+    return f"https://www.instagram.com/p/FX{code}/"
+
+
+@pytest.fixture
+def base_url():
+    server = start_fixture_server()
+    host, port = server.server_address
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_every_post(base_url):
+    post_urls = [fixture_post_url(index) for index in range(50)]
+    payloads = fetch_post_metadata(post_urls, [], workers=4, base_url=base_url)
+
+    assert list(payloads) == post_urls
+    for index, post_url in enumerate(post_urls):
+        item = payloads[post_url]["items"][0]
+        assert item["like_count"] == 1000 + index * 37
+        assert item["comment_count"] == 10 + index % 90
+        assert item["taken_at"] == BASE_TIMESTAMP + index * 86400
+
+
+def test_unknown_post_is_none(base_url):
+    # Not an "FX" shortcode, so the server answers 404
+    post_urls = [fixture_post_url(1), "https://www.instagram.com/p/Missing/"]
+    payloads = fetch_post_metadata(post_urls, [], workers=2, base_url=base_url)
+
+    assert payloads[post_urls[0]]["items"][0]["code"] == "FX1"
+    assert payloads[post_urls[1]] is None
+
+
+def test_requests_in_flight_are_capped_at_workers():
+    lock = threading.Lock()
+    in_flight = [0]
+    peak = [0]
+
+    class SlowHandler(FixtureHandler):
+        def do_GET(self):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                time.sleep(0.05)
+                super().do_GET()
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host, port = server.server_address
+        post_urls = [fixture_post_url(index) for index in range(40)]
+        payloads = fetch_post_metadata(post_urls, [], workers=3, base_url=f"http://{host}:{port}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert all(payload is not None for payload in payloads.values())
+    assert 1 < peak[0] <= 3
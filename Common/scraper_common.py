@@ -0,0 +1,397 @@
+"""
+Code shared by the Discord and Instagram scrapers: run metrics, --profile
+support, the chromedriver performance-log reader, the driver pool and the
+resource patterns blocked by the lean browsing profile.
+
+The scrapers aren't packages, so each adds this folder to sys.path and
+imports the module:
+
+    import scraper_common
+    from scraper_common import track_phase, run_with_driver_pool
+
+Settings the scripts change at run time (profiling_dir) are read from the
+module, so set them as scraper_common.profiling_dir.
+"""
+import os
+import sys
+import re
+import time
+import json
+import base64
+import queue
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+# URL patterns dropped by the lean browsing profile on both sites; each
+# scraper adds its own analytics endpoints. Images are also turned off
+# through Chrome's content settings. <img src> and other attributes stay in
+# the DOM, only the downloads are skipped.
+BLOCKED_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*",
+    "*.mp4*", "*.webm*", "*.m4a*", "*.mp3*", "*.ogg*",
+    "*.woff*", "*.woff2*", "*.ttf*", "*.otf*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*sentry.io*",
+]
+
+def log(message):
+    """Enhanced logging function with timestamp"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+# Per-phase run metrics: wall time, calls, WebDriver commands and items scraped
+metrics_lock = threading.Lock()
+phase_metrics = {}
+active_phase = threading.local()
+run_started_at = time.time()
+
+def phase_stats(name):
+    """Counters for one phase, created on first use. Caller holds metrics_lock."""
+    return phase_metrics.setdefault(name, {"calls": 0, "seconds": 0.0, "commands": 0, "items": 0})
+
+@contextmanager
+def phase(name):
+    """
+    Time a block as phase `name`. Phases nest: wall time is inclusive (an
+    outer phase includes its inner ones) while WebDriver commands are charged
+    to the innermost phase only. The active phase is tracked per thread.
+    """
+    previous = getattr(active_phase, "name", None)
+    active_phase.name = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        active_phase.name = previous
+        with metrics_lock:
+            stats = phase_stats(name)
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+
+def record_items(name, count):
+    """Add `count` scraped items to a phase's total."""
+    with metrics_lock:
+        phase_stats(name)["items"] += count
+
+def track_phase(name=None, items=None):
+    """
+    Decorator that runs a function as a phase (named after the function by
+    default). `items`, if given, maps the return value to an item count.
+    """
+    def decorator(func):
+        phase_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(phase_name):
+                result = func(*args, **kwargs)
+            if items is not None and result:
+                record_items(phase_name, items(result))
+            return result
+
+        return wrapper
+    return decorator
+
+def instrument_driver(driver):
+    """Count every command sent to chromedriver against the active phase."""
+    execute = driver.command_executor.execute
+
+    def counting_execute(command, params):
+        with metrics_lock:
+            phase_stats(getattr(active_phase, "name", None) or "other")["commands"] += 1
+        return execute(command, params)
+
+    driver.command_executor.execute = counting_execute
+    return driver
+
+def metrics_summary():
+    """Snapshot of the run metrics, with items per second for each phase."""
+    with metrics_lock:
+        phases = {name: dict(stats) for name, stats in phase_metrics.items()}
+
+    for stats in phases.values():
+        stats["seconds"] = round(stats["seconds"], 3)
+        stats["items_per_second"] = round(stats["items"] / stats["seconds"], 2) if stats["seconds"] else 0
+
+    return {
+        "run_started": datetime.utcfromtimestamp(run_started_at).isoformat(),
+        "run_seconds": round(time.time() - run_started_at, 3),
+        "webdriver_commands": sum(stats["commands"] for stats in phases.values()),
+        "phases": phases
+    }
+
+def save_metrics(json_file, prom_file, scraper):
+    """Write the run summary as JSON and in Prometheus text format."""
+    summary = metrics_summary()
+    with open(json_file, "w") as file:
+        json.dump(summary, file, indent=4)
+
+    metrics = [
+        ("scraper_phase_seconds_total", "counter", "Wall time spent in each phase", "seconds"),
+        ("scraper_phase_calls_total", "counter", "Times each phase ran", "calls"),
+        ("scraper_webdriver_commands_total", "counter", "WebDriver commands sent during each phase", "commands"),
+        ("scraper_items_total", "counter", "Items scraped by each phase", "items"),
+        ("scraper_items_per_second", "gauge", "Items scraped per second of phase time", "items_per_second"),
+    ]
+    lines = []
+    for metric, metric_type, help_text, key in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for name, stats in sorted(summary["phases"].items()):
+            lines.append(f'{metric}{{scraper="{scraper}",phase="{name}"}} {stats[key]}')
+    lines.append("# HELP scraper_run_seconds Wall time of the whole run")
+    lines.append("# TYPE scraper_run_seconds gauge")
+    lines.append(f'scraper_run_seconds{{scraper="{scraper}"}} {summary["run_seconds"]}')
+
+    with open(prom_file, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    log(f"Metrics saved to {json_file} and {prom_file}")
+
+# --profile mode: a sampling Python profiler plus a Chrome trace per target
+profiling_dir = None
+
+TRACE_CATEGORIES = ",".join([
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "v8.execute",
+    "blink.user_timing",
+    "loading",
+])
+
+def sample_stacks(thread_id, stop_event, interval, samples):
+    """Record the target thread's Python stack every `interval` seconds."""
+    while not stop_event.wait(interval):
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        samples.append((time.perf_counter(), stack[::-1]))
+
+def write_speedscope(filename, name, started, ended, samples):
+    """Save stack samples in speedscope's sampled-profile format."""
+    frames = []
+    frame_index = {}
+    stacks = []
+    weights = []
+    previous = started
+    for sampled_at, stack in samples:
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            indexes.append(frame_index[frame])
+        stacks.append(indexes)
+        weights.append(sampled_at - previous)
+        previous = sampled_at
+
+    profile = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": os.path.basename(__file__),
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": ended - started,
+            "samples": stacks,
+            "weights": weights
+        }]
+    }
+    with open(filename, "w") as file:
+        json.dump(profile, file)
+
+def profile_target(describe):
+    """
+    Decorator for top-level entry points. When profiling_dir is set, the call
+    runs under the stack sampler while Chrome traces the same window, and
+    <target>.speedscope.json plus <target>.trace.json are written for it.
+    describe(*args) names the target, e.g. the URL being scraped.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(driver, *args, **kwargs):
+            if not profiling_dir:
+                return func(driver, *args, **kwargs)
+
+            target = describe(driver, *args)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", target).strip("_")[-80:] or func.__name__
+            slug = f"{slug}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.makedirs(profiling_dir, exist_ok=True)
+
+            try:
+                drain_performance_log(driver)
+            except Exception as e:
+                log(f"Chrome tracing unavailable: {e}")
+
+            samples = []
+            stop_event = threading.Event()
+            sampler = threading.Thread(
+                target=sample_stacks,
+                args=(threading.get_ident(), stop_event, 0.005, samples),
+                daemon=True
+            )
+            started_at = datetime.utcnow().isoformat()
+            started = time.perf_counter()
+            sampler.start()
+            try:
+                return func(driver, *args, **kwargs)
+            finally:
+                stop_event.set()
+                sampler.join()
+                ended = time.perf_counter()
+
+                profile_file = os.path.join(profiling_dir, f"{slug}.speedscope.json")
+                trace_file = os.path.join(profiling_dir, f"{slug}.trace.json")
+                write_speedscope(profile_file, target, started, ended, samples)
+                try:
+                    trace_events = drain_performance_log(driver)
+                except Exception:
+                    trace_events = []
+                with open(trace_file, "w") as file:
+                    json.dump({
+                        "traceEvents": trace_events,
+                        "metadata": {
+                            "target": target,
+                            "started": started_at,
+                            "seconds": round(ended - started, 3),
+                            "python_profile": os.path.basename(profile_file)
+                        }
+                    }, file)
+                log(f"Profile saved to {profile_file} and {trace_file}")
+
+        return wrapper
+    return decorator
+
+# --- Performance log -----------------------------------------------------------
+# chromedriver's performance log carries both the Network.* events the
+# network engines decode and the trace events --profile saves. Both read the
+# one log, so everything that reads it goes through drain_performance_log.
+
+# Undecoded Network.* messages per driver session. Only sessions registered
+# with enable_network_capture are buffered.
+network_buffers = {}
+
+def enable_network_capture(driver):
+    """Start buffering the driver's Network.* messages (see take_network_log)."""
+    network_buffers.setdefault(driver.session_id, [])
+
+def drain_performance_log(driver):
+    """
+    Read chromedriver's performance log once. Network.* messages are queued
+    in the session's network buffer when capture is enabled for it; trace
+    events (for --profile) are returned.
+    """
+    trace_events = []
+    buffer = network_buffers.get(driver.session_id)
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method", "")
+        if method == "Tracing.dataCollected":
+            trace_events.extend(message["params"].get("value", []))
+        elif buffer is not None and method.startswith("Network."):
+            buffer.append(message)
+    return trace_events
+
+def take_network_log(driver):
+    """Drain the performance log and return (and clear) the session's buffered Network messages."""
+    drain_performance_log(driver)
+    messages = network_buffers.get(driver.session_id)
+    if messages is None:
+        return []
+    network_buffers[driver.session_id] = []
+    return messages
+
+def fetch_response_bodies(driver, messages, url_predicate):
+    """
+    Fetch the bodies of the finished responses in messages whose URL passes
+    url_predicate, while Chrome still has them (only until the next
+    navigation). Each body is attached to its Network.loadingFinished
+    message as params["body"]; the bodies are also returned in order.
+    """
+    requests = set()
+    bodies = []
+    for message in messages:
+        params = message.get("params", {})
+        if message["method"] == "Network.responseReceived":
+            if url_predicate(params["response"]["url"]):
+                requests.add(params["requestId"])
+        elif message["method"] == "Network.loadingFinished" and params.get("requestId") in requests:
+            try:
+                body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            except Exception as e:
+                log(f"Response body no longer available for {params['requestId']}: {e}")
+                continue
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8", "replace")
+            params["body"] = text
+            bodies.append(text)
+    return bodies
+
+# --- Driver pool ------------------------------------------------------------------
+
+def run_with_driver_pool(task, items, workers, make_driver):
+    """
+    Run task(driver, item) for every item on at most `workers` threads.
+    Each thread borrows a driver from the pool, so no more than `workers`
+    browsers are ever started; make_driver(slot) builds the browser for a
+    new slot. Results come back in the order they finish, with None results
+    left out.
+
+    items may be a generator: only a few items per worker are pulled ahead
+    of the browsers, so long inputs are streamed rather than queued up. A
+    new item is submitted as soon as any one finishes, so a slow item never
+    holds up the other workers.
+    """
+    idle_drivers = queue.Queue()
+    created = []
+    slot_lock = threading.Lock()
+
+    def run(item):
+        try:
+            driver = idle_drivers.get_nowait()
+        except queue.Empty:
+            with slot_lock:
+                slot = len(created)
+                created.append(None)
+            driver = make_driver(slot)
+            created[slot] = driver
+
+        try:
+            return task(driver, item)
+        finally:
+            idle_drivers.put(driver)
+
+    results = []
+    in_flight = set()
+
+    def collect(return_when):
+        done, pending = wait(in_flight, return_when=return_when)
+        in_flight.intersection_update(pending)
+        for future in done:
+            result = future.result()
+            if result is not None:
+                results.append(result)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for item in items:
+                in_flight.add(executor.submit(run, item))
+                if len(in_flight) >= 2 * max(1, workers):
+                    collect(FIRST_COMPLETED)
+            if in_flight:
+                collect(ALL_COMPLETED)
+        return results
+    finally:
+        for driver in created:
+            if driver is not None:
+                driver.quit()
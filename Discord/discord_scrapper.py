@@ -1,9 +1,17 @@
+import sys
 import time
+import argparse
 import json
 import random
 import os
+import io
+import gzip
+import zlib
+import base64
+import threading
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -17,19 +25,117 @@ from selenium.common.exceptions import StaleElementReferenceException
 from selenium.common.exceptions import NoSuchElementException
 import re
 
+# Code shared with the Instagram scraper
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import scraper_common
+from scraper_common import (
+    log, phase, record_items, track_phase, instrument_driver, save_metrics, profile_target,
+    TRACE_CATEGORIES, enable_network_capture, take_network_log, fetch_response_bodies,
+    run_with_driver_pool
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 load_dotenv()
 
 discord_email = os.getenv("DISCORD_EMAIL")
 discord_password = os.getenv("DISCORD_PASSWORD")
+discord_user_data_dir = os.getenv("DISCORD_USER_DATA_DIR")
+scraper_workers = int(os.getenv("SCRAPER_WORKERS") or 1)
+channel_tabs = int(os.getenv("DISCORD_CHANNEL_TABS") or 1)
+output_stream_file = os.getenv("DISCORD_OUTPUT_STREAM") or "discord_data.ndjson"
+incremental_sync = (os.getenv("DISCORD_INCREMENTAL") or "").lower() in ("1", "true", "yes")
+message_backfill = (os.getenv("DISCORD_BACKFILL") or "").lower() in ("1", "true", "yes")
+max_channel_messages = int(os.getenv("DISCORD_MAX_MESSAGES") or 0) or None
+messages_since = datetime.fromisoformat(os.getenv("DISCORD_SINCE")) if os.getenv("DISCORD_SINCE") else None
+messages_stream_file = os.getenv("DISCORD_MESSAGES_STREAM")
+scrape_engine = os.getenv("DISCORD_ENGINE") or "dom"
+network_capture_file = os.getenv("DISCORD_NETWORK_CAPTURE")
+metrics_json_file = os.getenv("DISCORD_METRICS_JSON") or "discord_metrics.json"
+metrics_prom_file = os.getenv("DISCORD_METRICS_PROM") or "discord_metrics.prom"
+browser_headless = (os.getenv("SCRAPER_HEADLESS") or "").lower() in ("1", "true", "yes")
+browser_window_size = os.getenv("SCRAPER_WINDOW_SIZE")
+browser_block_resources = (os.getenv("SCRAPER_BLOCK_RESOURCES") or "").lower() in ("1", "true", "yes")
+browser_render_profile = (os.getenv("SCRAPER_RENDER_PROFILE") or "").lower() in ("1", "true", "yes")
+
+# URL patterns dropped by the lean browsing profile: the shared ones plus
+# Discord's telemetry. These are set per tab (see setup_tab); images are also
+# turned off through Chrome's content settings, which cover the whole browser.
+BLOCKED_URL_PATTERNS = scraper_common.BLOCKED_URL_PATTERNS + [
+    "*discord.com/api/v*/science*", "*discord.com/api/v*/metrics*",
+]
+
+# Optional page profile for long virtual-list scrolls: switches off CSS
+# animations and transitions, and exposes window.__scraperRelease so the
+# harvesters can stop the browser rendering nodes they've already recorded.
+# Released nodes keep their size (so scroll offsets don't move) but their
+# subtree is skipped by layout and paint. Nodes aren't removed outright
+# because Discord's React tree still owns them.
+RENDER_PROFILE_JS = """
+(function () {
+    var css = "*, *::before, *::after {"
+        + " animation: none !important;"
+        + " transition: none !important;"
+        + " scroll-behavior: auto !important; }";
+    function inject() {
+        var style = document.createElement("style");
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    }
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", inject);
+    } else {
+        inject();
+    }
+
+    window.__scraperRelease = function (node) {
+        if (!node || node.__scraperReleased) return;
+        var rect = node.getBoundingClientRect();
+        node.style.containIntrinsicSize = rect.width + "px " + rect.height + "px";
+        node.style.contentVisibility = "hidden";
+        node.__scraperReleased = true;
+    };
+})();
+"""
+
+DISCORD_APP_URL = 'https://canary.discord.com/channels/@me'
 
-data = []
+# Session ids of drivers already verified as logged in during this run
+authenticated_sessions = set()
+
+# Per-tab CDP options of each driver (session id -> setup_tab kwargs), so tabs
+# opened later get the same setup as the first one
+tab_settings = {}
+
+checkpoint_lock = threading.Lock()
+
+# Network engine: decoder state per session (the undecoded messages are
+# buffered by scraper_common)
+network_states = {}
+output_lock = threading.Lock()
+
+def configure_driver(user_data_dir=None, debugging_port=9222, headless=browser_headless,
+                     window_size=browser_window_size, block_resources=browser_block_resources,
+                     render_profile=browser_render_profile):
+    """
+    Pass user_data_dir to keep the Chrome profile (and with it Discord's
+    login state, which lives in localStorage) between runs. Concurrent
+    browsers on one host each need their own debugging_port and profile.
 
-def log(message):
-    """Enhanced logging function with timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+    headless, window_size ("W,H") and block_resources give the lean profile:
+    no window, and no image/media/font/analytics downloads.
 
-def configure_driver():
+    render_profile emulates prefers-reduced-motion and injects
+    RENDER_PROFILE_JS to cut rendering work during long scrolls.
+    """
     log("Initializing Chrome driver with anti-detection settings")
     options = Options()
     
@@ -38,11 +144,41 @@ def configure_driver():
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-gpu")
-    options.add_argument("--remote-debugging-port=9222")
-    options.add_argument("--start-maximized")
+    # Keep background tabs rendering at full speed for multi-tab harvesting
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument(f"--remote-debugging-port={debugging_port}")
+    if headless:
+        options.add_argument("--headless=new")
+        # Headless windows default to 800x600, which collapses desktop layouts
+        window_size = window_size or "1920,1080"
+    if window_size:
+        options.add_argument(f"--window-size={window_size}")
+    else:
+        options.add_argument("--start-maximized")
+    if block_resources:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
     options.add_argument("--lang=en-US")
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+        log(f"Using persistent Chrome profile: {user_data_dir}")
     options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
     options.add_experimental_option("useAutomationExtension", False)
+    perf_logging_prefs = {}
+    if scraper_common.profiling_dir:
+        # chromedriver records these trace categories into the performance log
+        perf_logging_prefs["traceCategories"] = TRACE_CATEGORIES
+    if scrape_engine == "network":
+        # ...and REST/gateway traffic for the network capture engine
+        perf_logging_prefs["enableNetwork"] = True
+    if perf_logging_prefs:
+        # chromedriver logs Network and Page events unless told otherwise;
+        # nothing reads them when only profiling
+        perf_logging_prefs.setdefault("enableNetwork", False)
+        perf_logging_prefs["enablePage"] = False
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", perf_logging_prefs)
     
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
     
@@ -51,16 +187,21 @@ def configure_driver():
         options=options
     )
     
-    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-        "source": """
-        Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-        window.chrome = { runtime: {} };
-        """
-    })
+    tab_settings[driver.session_id] = {"block_resources": block_resources, "render_profile": render_profile}
+    setup_tab(driver, **tab_settings[driver.session_id])
+    if block_resources:
+        log(f"Blocking {len(BLOCKED_URL_PATTERNS)} resource patterns")
+    if render_profile:
+        log("Render-cost profile enabled")
+
+    if scrape_engine == "network":
+        enable_network_capture(driver)
+    instrument_driver(driver)
     
     log("Driver configured successfully")
     return driver
 
+@track_phase()
 def login_discord(driver, email, password):
     """Universal login handler with domain support"""
     login_url = 'https://canary.discord.com/login'
@@ -97,39 +238,128 @@ def login_discord(driver, email, password):
         log(f"Login failed: {str(e)}")
         raise
     
+def is_logged_in(driver, timeout=10):
+    """
+    Open channels/@me and report whether Discord keeps us there. An
+    unauthenticated browser is redirected to /login instead.
+    """
+    driver.get(DISCORD_APP_URL)
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: '/login' in d.current_url
+            or d.find_elements(By.CSS_SELECTOR, "nav[aria-label*='Servers']")
+        )
+    except TimeoutException:
+        return False
+    return 'channels/@me' in driver.current_url
+
+def ensure_logged_in(driver, email, password):
+    """
+    Log in only when needed: once a driver has been verified it is trusted
+    for the rest of the run, and a browser restored from a persistent
+    profile skips the login form entirely.
+    """
+    if driver.session_id in authenticated_sessions:
+        return True
+
+    if is_logged_in(driver):
+        log("Reusing existing Discord session")
+    else:
+        log("Logging into Discord")
+        login_discord(driver, email, password)
+
+    authenticated_sessions.add(driver.session_id)
+    return True
+
 def extract_server_id(server_url):
     """Extract server ID from the server URL."""
     return server_url.split("/")[-1]
 
-def partial_scroll(driver, scroll_container, fraction=0.25):
+# Optionally scrolls, then resolves once the element's subtree has stopped
+# mutating for quietMs (or after timeoutMs at the latest). The observer is
+# installed before the scroll so no re-render can slip past it. With
+# expectChange the quiet timer only starts after the first mutation, for
+# scrolls that trigger a network fetch before anything re-renders.
+# Resolves with whether any mutation was seen.
+SCROLL_AND_SETTLE_JS = """
+var el = arguments[0] || document.body;
+var mode = arguments[1];
+var amount = arguments[2];
+var quietMs = arguments[3];
+var timeoutMs = arguments[4];
+var expectChange = arguments[5];
+var done = arguments[arguments.length - 1];
+
+var scroller = el;
+while (scroller && scroller !== document.body && scroller.scrollHeight <= scroller.clientHeight) {
+    scroller = scroller.parentElement;
+}
+if (!scroller || scroller === document.body) scroller = el;
+
+var changed = false;
+var quietTimer = null;
+var finished = false;
+function finish() {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(hardTimer);
+    done(changed);
+}
+var observer = new MutationObserver(function() {
+    changed = true;
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(finish, quietMs);
+});
+observer.observe(el, {childList: true, subtree: true, characterData: true});
+var hardTimer = setTimeout(finish, timeoutMs);
+if (!expectChange) quietTimer = setTimeout(finish, quietMs);
+
+if (mode === "by") scroller.scrollTop += scroller.clientHeight * amount;
+else if (mode === "top") scroller.scrollTop = 0;
+else if (mode === "bottom") scroller.scrollTop = scroller.scrollHeight;
+"""
+
+def scroll_and_settle(driver, element=None, scroll=None, amount=0, quiet=0.25, timeout=2,
+                      expect_change=False):
     """
-    Scroll the container incrementally by 'fraction' of its visible height.
-    This helps reveal intermediate items in Discord's virtual list,
-    so that group headers or new Online members aren't skipped.
+    Scroll `element` ("by" a fraction of its height, to the "top", to the
+    "bottom", or not at all) and block until the virtual list has re-rendered
+    and gone quiet, with `timeout` seconds as the upper bound. Returns True
+    if the DOM changed.
     """
-    current_pos = driver.execute_script("return arguments[0].scrollTop", scroll_container)
-    viewport_height = driver.execute_script("return arguments[0].clientHeight", scroll_container)
-    new_pos = current_pos + (viewport_height * fraction)
-
-    driver.execute_script(f"arguments[0].scrollTop = {new_pos}", scroll_container)
-    time.sleep(2)
+    return driver.execute_async_script(
+        SCROLL_AND_SETTLE_JS,
+        element, scroll, amount, int(quiet * 1000), int(timeout * 1000), expect_change
+    )
 
-def extract_groups_and_online_members(driver, server_id, target_group="Online"):
+def wait_for_page_ready(driver, timeout=7, quiet=0.5):
     """
-    1) Clicks the 'Show Member List'.
-    2) Finds the scrollable container (the 'scrollerBase_*' div).
-    3) Continuously partial-scrolls to find all group headers:
-       - For each group header:
-         * Extract and store (group_name, count_from_header).
-         * If group_name == target_group (e.g., "Online"), extract all usernames.
-    4) Stops when multiple scrolls yield no new group headers or no new Online members.
-    5) Returns a structure with:
-         - A list of all groups (name + total count from header).
-         - A list of all members in the 'Online' group.
+    Wait for the document to finish loading and Discord's client to stop
+    rendering, instead of sleeping for the worst case.
     """
+    started = time.monotonic()
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        return
+    remaining = timeout - (time.monotonic() - started)
+    if remaining > 0:
+        scroll_and_settle(driver, quiet=quiet, timeout=remaining)
 
-    log("Extracting group counts + online members...")
+def partial_scroll(driver, scroll_container, fraction=0.25):
+    """
+    Scroll the container incrementally by 'fraction' of its visible height.
+    This helps reveal intermediate items in Discord's virtual list,
+    so that group headers or new Online members aren't skipped.
+    """
+    scroll_and_settle(driver, scroll_container, "by", fraction, timeout=2)
 
+def open_member_list(driver, server_id):
+    """Click 'Show Member List' and return the member list's scroll container."""
     try:
         member_list_btn = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable(
@@ -145,13 +375,11 @@ def extract_groups_and_online_members(driver, server_id, target_group="Online"):
         log(f"Error clicking 'Show Member List': {e}")
         raise
 
-    scroll_container = None
     try:
         container_selector = f'div[data-list-id="members-{server_id}"]'
-        container = WebDriverWait(driver, 15).until(
+        scroll_container = WebDriverWait(driver, 15).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, container_selector))
         )
-        scroll_container = container
         log("Located the scrollable container.")
     except TimeoutException:
         log("Failed to locate the scrollable container in time.")
@@ -160,6 +388,35 @@ def extract_groups_and_online_members(driver, server_id, target_group="Online"):
         log(f"Error finding scrollable container: {e}")
         raise
 
+    return scroll_container
+
+def parse_group_header(group_text):
+    """Split a header like "Online — 12 members" into ("Online", 12), or None."""
+    match = re.match(r"^(.*?)\s*[,—\-]\s*(\d+)\s+members?(.*)$", group_text)
+    if not match:
+        return None
+    return match.group(1).strip(), int(match.group(2))
+
+@track_phase(items=lambda result: len(result["online_members"]))
+def extract_groups_and_online_members(driver, server_id, target_group="Online"):
+    """
+    1) Clicks the 'Show Member List'.
+    2) Finds the scrollable container (the 'scrollerBase_*' div).
+    3) Continuously partial-scrolls to find all group headers:
+       - For each group header:
+         * Extract and store (group_name, count_from_header).
+         * If group_name == target_group (e.g., "Online"), extract all usernames.
+    4) Stops when multiple scrolls yield no new group headers or no new Online members.
+    5) Returns a structure with:
+         - A list of all groups (name + total count from header).
+         - A list of all members in the 'Online' group.
+    """
+
+    log("Extracting group counts + online members...")
+
+    scroll_container = open_member_list(driver, server_id)
+    container_selector = f'div[data-list-id="members-{server_id}"]'
+
     group_counts = {} 
     online_members = {}
     scroll_attempts = 0
@@ -194,13 +451,12 @@ def extract_groups_and_online_members(driver, server_id, target_group="Online"):
                     "return arguments[0].textContent.replace(/\\s+/g, ' ').trim();",
                     group_header
                 )
-                match = re.match(r"^(.*?)\s*[,—\-]\s*(\d+)\s+members?(.*)$", group_text)
-                if not match:
+                parsed = parse_group_header(group_text)
+                if not parsed:
                     log(f"⚠️ Couldn't parse group header: {group_text}")
                     continue
 
-                group_name = match.group(1).strip()
-                group_count = int(match.group(2))
+                group_name, group_count = parsed
 
                 if (group_name not in group_counts) or (group_counts[group_name] != group_count):
                     group_counts[group_name] = group_count
@@ -277,95 +533,199 @@ def extract_groups_and_online_members(driver, server_id, target_group="Online"):
     log(f"Done. Found {len(groups_list)} groups total. Extracted {len(online_list)} '{target_group}' members.")
     return final_data
 
-def scrape_server_data(driver, server_url, username, password, channel_urls=[]):
-    try:
-        # Login
-        log("Logging into Discord")
-        login_discord(driver, username, password)
-
-        log(f"Accessing server: {server_url}")
-        driver.get(server_url)
-
-        server_info = {
-            "server_name": "",
-            "server_id": extract_server_id(server_url),
-            "channels": [],
-            "members": {},
-            "messages": [],
-            "last_active": ""
+# Walks the server's channel sidebar in one async call: expands collapsed
+# categories, scrolls the (virtualized) list top to bottom, and returns the
+# category -> channels tree as JSON. Channels rendered above the first visible
+# category header belong to the last category seen on the previous step.
+EXTRACT_CHANNEL_TREE_JS = """
+var nav = arguments[0];
+var done = arguments[arguments.length - 1];
+var list = nav.querySelector("ul[aria-label='Channels']") || nav;
+
+var scroller = list;
+while (scroller && scroller !== nav.parentElement && scroller.scrollHeight <= scroller.clientHeight) {
+    scroller = scroller.parentElement;
+}
+if (!scroller || scroller === nav.parentElement) scroller = list;
+
+var tree = [];
+var categories = {};
+var seen = {};
+var current = null;
+var steps = 0;
+
+function settle(callback) {
+    var timer = null;
+    var observer = new MutationObserver(function () {
+        clearTimeout(timer);
+        timer = setTimeout(finish, 50);
+    });
+    var cap = setTimeout(finish, 500);
+    var finished = false;
+    function finish() {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(cap);
+        callback();
+    }
+    observer.observe(list, {childList: true, subtree: true, attributes: true});
+    timer = setTimeout(finish, 50);
+}
+
+function category(name) {
+    if (!(name in categories)) {
+        categories[name] = {category: name, channels: []};
+        tree.push(categories[name]);
+    }
+    return categories[name];
+}
+
+function expandCollapsed() {
+    var collapsed = list.querySelectorAll("li[draggable='true'] [aria-expanded='false']");
+    var clicked = 0;
+    for (var i = 0; i < collapsed.length; i++) {
+        if (collapsed[i].__scraperExpanded) continue;
+        collapsed[i].__scraperExpanded = true;
+        collapsed[i].click();
+        clicked++;
+    }
+    return clicked;
+}
+
+function collect() {
+    var items = list.querySelectorAll("li[data-dnd-name]");
+    for (var i = 0; i < items.length; i++) {
+        var item = items[i];
+        var name = item.getAttribute("data-dnd-name");
+        if (item.getAttribute("draggable") === "true") {
+            current = category(name);
+            continue;
         }
 
-        time.sleep(7)
-        log("Scraping server data")
-        # Extract server name
-        server_id = str(server_info['server_id'])
-
-        # Find the div with matching id, then locate h3 inside it
-        xpath = f"//div[contains(@id, 'chat-messages-{server_id}')]//h3"
-
-        log("Extracting server name")
-        log(f"Xpath: {xpath}")
-
-        # Wait for the h3 element inside the identified div
-        element = WebDriverWait(driver, 15).until(
-            EC.visibility_of_element_located((By.XPATH, xpath))
-        )
-
-        full_text = element.text.strip()
-
-        # Extract the last part after splitting by newline
-        server_info["server_name"] = full_text.split("\n")[-1].strip()
-        
-        log(f"Server name: {server_info['server_name']}")
+        var link = item.querySelector("a");
+        var id = (link && link.getAttribute("data-list-item-id")) || name;
+        if (id in seen) continue;
+        seen[id] = true;
+
+        var owner = current || category(null);
+        var isVoice = owner.category && owner.category.toLowerCase().indexOf("voice") !== -1;
+        owner.channels.push({
+            name: name,
+            id: id,
+            url: link ? link.href : null,
+            type: isVoice ? "voice" : "text"
+        });
+    }
+}
 
-        # Extract channels
-        log("Extracting channels")
-        xpath = f"//nav[contains(@aria-label, '{server_info['server_name']} (server)')]"
+function step() {
+    if (expandCollapsed() > 0) {
+        settle(step);
+        return;
+    }
+    collect();
 
-        log(f"Xpath: {xpath}")
-        main_container = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, xpath)))
+    var atBottom = scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 2;
+    if (atBottom || ++steps > 500) {
+        done(JSON.stringify(tree.filter(function (c) { return c.channels.length > 0; })));
+        return;
+    }
+    scroller.scrollTop += scroller.clientHeight * 0.8;
+    settle(step);
+}
 
-        all_items = main_container.find_elements(By.XPATH, ".//ul[@aria-label='Channels']//li[@data-dnd-name]")
+scroller.scrollTop = 0;
+settle(step);
+"""
 
-        server_info["channels"] = []
-        current_category = None
-        category_channels = []
+@track_phase(items=lambda channels: sum(len(category["channels"]) for category in channels))
+def extract_channel_tree(driver, nav_container):
+    """
+    Return the server's channels grouped by category, in sidebar order:
+       [{"category": "...", "channels": [{"name", "id", "url", "type"}, ...]}, ...]
+    The whole tree is read in one script call instead of several WebDriver
+    calls per channel.
+    """
+    return json.loads(driver.execute_async_script(EXTRACT_CHANNEL_TREE_JS, nav_container))
 
-        log(f"Found {len(all_items)} items")
-        for item in all_items:
-            if item.get_attribute("draggable") == "true":
-                if current_category and category_channels:
-                        server_info["channels"].append({
-                            "category": current_category,
-                            "channels": category_channels
-                        })
+@profile_target(lambda driver, server_url, *args: server_url)
+@track_phase(items=lambda result: 1)
+def scrape_server_data(driver, server_url, username, password, channel_urls=[], checkpoints=None, tabs=1,
+                       backfill=False, max_messages=None, since=None, message_sink=None):
+    """
+    Scrape one server's name, channels, members and the messages of
+    channel_urls. backfill, max_messages, since and message_sink are passed
+    to extract_messages; with a message_sink the messages are streamed to it
+    instead of being kept in the returned server_info.
+    """
+    try:
+        with phase("scrape_server_data.navigation"):
+            # Login (skipped when this browser already has a session)
+            ensure_logged_in(driver, username, password)
+
+            log(f"Accessing server: {server_url}")
+            driver.get(server_url)
+            wait_for_page_ready(driver)
+
+            server_info = {
+                "server_name": "",
+                "server_id": extract_server_id(server_url),
+                "channels": [],
+                "members": {},
+                "messages": [],
+                "last_active": ""
+            }
+
+            if '/login' in driver.current_url:
+                log("Session expired, logging in again")
+                authenticated_sessions.discard(driver.session_id)
+                ensure_logged_in(driver, username, password)
+                driver.get(server_url)
+                wait_for_page_ready(driver)
+
+        with phase("scrape_server_data.server_name"):
+            log("Scraping server data")
+            # Extract server name
+            server_id = str(server_info['server_id'])
+
+            # Find the div with matching id, then locate h3 inside it
+            xpath = f"//div[contains(@id, 'chat-messages-{server_id}')]//h3"
+
+            log("Extracting server name")
+            log(f"Xpath: {xpath}")
+
+            # Wait for the h3 element inside the identified div
+            element = WebDriverWait(driver, 15).until(
+                EC.visibility_of_element_located((By.XPATH, xpath))
+            )
 
-                current_category = item.get_attribute("data-dnd-name")
-                category_channels = []
+            full_text = element.text.strip()
 
-            else:
-                channel_name = item.get_attribute("data-dnd-name")
-                channel_url = item.find_element(By.XPATH, ".//a").get_attribute("href")
-                channel_id = item.find_element(By.XPATH, ".//a").get_attribute("data-list-item-id") or channel_name
+            # Extract the last part after splitting by newline
+            server_info["server_name"] = full_text.split("\n")[-1].strip()
+        
+            log(f"Server name: {server_info['server_name']}")
 
-                channel_type = "voice" if "voice" in current_category.lower() else "text"
+        with phase("scrape_server_data.channels"):
+            # Extract channels
+            log("Extracting channels")
+            xpath = f"//nav[contains(@aria-label, '{server_info['server_name']} (server)')]"
 
-                category_channels.append({
-                    "name": channel_name,
-                    "id": channel_id,
-                    "url": channel_url,
-                    "type": channel_type
-                })
+            log(f"Xpath: {xpath}")
+            main_container = WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.XPATH, xpath)))
 
-            log(f"server_info['channels']: {server_info['channels']}")
+            server_info["channels"] = extract_channel_tree(driver, main_container)
 
-        log(f"Extracted {len(server_info['channels'])} channels")
+            channel_count = sum(len(category["channels"]) for category in server_info["channels"])
+            log(f"Extracted {channel_count} channels in {len(server_info['channels'])} categories")
 
         # Extract members
         log("Extracting channel members...")
 
-        result = extract_groups_and_online_members(driver, server_id, target_group="member")
+        result, server_info["last_active"] = harvest_member_list(driver, server_id, target_group="member")
         log(f"Final result:\n{result}")
 
         server_info["members"] = result
@@ -375,20 +735,492 @@ def scrape_server_data(driver, server_url, username, password, channel_urls=[]):
     except Exception as e:
         print(f"Scraping failed: {str(e)}")
         return None
-    
-    server_info["last_active"] = extract_last_active(driver, server_info["server_id"])
 
     log("Extracting messages...")
-    updated_info = extract_messages(driver, server_info, channel_urls)
-    print(f"Updated info: {updated_info}")
-    if updated_info:
-        log("Final extracted data:")
-        for idx, msg in enumerate(updated_info["messages"], start=1):
-            log(f"{idx}) [{msg['timestamp']}] {msg['username']}: {msg['content']} (Attachments: {msg['attachments']})")
+    extract_messages(
+        driver, server_info, channel_urls,
+        backfill=backfill, max_messages=max_messages, since=since, sink=message_sink,
+        checkpoints=checkpoints, tabs=tabs
+    )
+    if message_sink is None:
+        log(f"Extracted {len(server_info['messages'])} messages from {len(channel_urls)} channels")
+
+    return server_info
+
+# Serializes every rendered message <li> in a single round-trip. Mirrors the
+# per-element lookups in parse_message_elements, including the header fallback
+# for the username and the datetime -> aria-label fallback for the timestamp.
+# With a truthy second argument, serialized <li>s are handed to the render
+# profile's __scraperRelease (when it's installed).
+EXTRACT_MESSAGES_JS = """
+var root = arguments[0];
+var release = arguments[1] && window.__scraperRelease;
+var items = root.querySelectorAll("li[id^='chat-messages-']");
+var out = [];
+for (var i = 0; i < items.length; i++) {
+    var li = items[i];
+    var username = "Unknown";
+    var timestamp = "Unknown";
+    var content = "";
+    var attachments = [];
+
+    var userEl = li.querySelector("span[id^='message-username-'], span[class*='username_']");
+    if (!userEl) {
+        var header = li.querySelector("h3[class*='header_']");
+        if (header) userEl = header.querySelector("span[class*='username_']");
+    }
+    if (userEl) username = (userEl.innerText || userEl.textContent).trim();
+
+    var timeEl = li.querySelector("time");
+    if (timeEl) {
+        timestamp = timeEl.getAttribute("datetime") || timeEl.getAttribute("aria-label") || "Unknown";
+    }
+
+    var contentEl = li.querySelector("div[id^='message-content.'], div[class*='messageContent_']");
+    if (contentEl) content = (contentEl.innerText || contentEl.textContent).trim();
+
+    var imgs = li.querySelectorAll("img");
+    for (var j = 0; j < imgs.length; j++) {
+        var src = imgs[j].getAttribute("src");
+        if (src && src.indexOf("cdn.discordapp.com") !== -1) attachments.push(src);
+    }
+
+    out.push({
+        id: li.id,
+        username: username,
+        timestamp: timestamp,
+        content: content,
+        attachments: attachments
+    });
+    if (release) release(li);
+}
+return JSON.stringify(out);
+"""
+
+def extract_visible_messages(driver, ol_element, release=False):
+    """
+    Batched extraction: serialize every rendered message in one execute_script
+    call and decode the JSON payload. Each dict carries the <li> id alongside
+    the usual username/timestamp/content/attachments fields.
+    """
+    payload = driver.execute_script(EXTRACT_MESSAGES_JS, ol_element, release)
+    return json.loads(payload or "[]")
+
+def parse_message_elements(ol_element):
+    """
+    Per-element extraction (one WebDriver call per lookup). Kept as a fallback
+    for when the batched script cannot be used; returns the same dicts as
+    extract_visible_messages.
+    """
+    messages = []
+    message_elements = ol_element.find_elements(
+        By.CSS_SELECTOR,
+        "li[id^='chat-messages-']"
+    )
+
+    for msg_el in message_elements:
+        try:
+            username = "Unknown"
+            timestamp = "Unknown"
+            content = ""
+            attachments = []
+
+            # --- Extract Username (Two-step fallback) ---
+            try:
+                username_el = msg_el.find_element(
+                    By.CSS_SELECTOR,
+                    "span[id^='message-username-'], span[class*='username_']"
+                )
+                username = username_el.text.strip()
+            except NoSuchElementException:
+                try:
+                    heading_el = msg_el.find_element(By.CSS_SELECTOR, "h3[class*='header_']")
+                    possible_user_el = heading_el.find_element(By.CSS_SELECTOR, "span[class*='username_']")
+                    username = possible_user_el.text.strip()
+                except NoSuchElementException:
+                    pass
+
+            # --- Extract Timestamp ---
+            # We try .datetime first, then fallback to .aria-label
+            try:
+                time_el = msg_el.find_element(By.CSS_SELECTOR, "time")
+                datetime_attr = time_el.get_attribute("datetime")
+                aria_label = time_el.get_attribute("aria-label")
+
+                # If the <time> tag doesn't have datetime, use aria-label
+                if datetime_attr:
+                    timestamp = datetime_attr
+                elif aria_label:
+                    timestamp = aria_label
+                else:
+                    timestamp = "Unknown"
+            except NoSuchElementException:
+                pass
+
+            # --- Extract Content ---
+            try:
+                content_el = msg_el.find_element(
+                    By.CSS_SELECTOR,
+                    "div[id^='message-content.'], div[class*='messageContent_']"
+                )
+                content = content_el.text.strip()
+            except NoSuchElementException:
+                pass
+
+            image_els = msg_el.find_elements(By.CSS_SELECTOR, "img")
+            for img_el in image_els:
+                src = img_el.get_attribute("src")
+                if src and "cdn.discordapp.com" in src:
+                    attachments.append(src)
+
+            messages.append({
+                "id": msg_el.get_attribute("id"),
+                "username": username,
+                "timestamp": timestamp,
+                "content": content,
+                "attachments": attachments
+            })
+
+        except Exception as ex:
+            log(f"Skipping one message due to error: {ex}")
+
+    return messages
+
+def message_snowflake(element_id):
+    """
+    Return the message snowflake from a 'chat-messages-<channel>-<message>' id,
+    or None if the id doesn't follow that format. Snowflakes grow with time.
+    """
+    try:
+        return int(str(element_id).rsplit("-", 1)[-1])
+    except (TypeError, ValueError):
+        return None
+
+def parse_message_timestamp(timestamp):
+    """Parse a <time datetime> value into an aware UTC datetime, or None."""
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def open_channel(driver, channel_url):
+    """
+    Navigate to a channel and return its <ol data-list-id="chat-messages">,
+    scrolled to the newest messages. Returns None if the list never appears.
+    """
+    driver.get(channel_url)
+    # Allow Discord to load
+    wait_for_page_ready(driver, timeout=5)
+
+    return prepare_chat_list(driver, channel_url)
+
+def prepare_chat_list(driver, channel_url):
+    """
+    Wait for the current page's <ol data-list-id="chat-messages"> and scroll
+    it to the newest messages. Returns None if the list never appears.
+    """
+    try:
+        # 1) Wait for <ol data-list-id="chat-messages"> to appear
+        ol_element = WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "ol[data-list-id='chat-messages']")
+            )
+        )
+        log("Located the <ol data-list-id='chat-messages'> element.")
+    except TimeoutException:
+        log(f"Timed out waiting for chat-messages <ol> in {channel_url}.")
+        return None
+
+    # 2) Scroll to bottom to see the newest messages
+    scroll_and_settle(driver, ol_element, "bottom", timeout=2)
+    return ol_element
+
+def read_messages(driver, ol_element, batched=True, release=False):
+    """Parse every rendered <li> with id starting "chat-messages-"."""
+    if batched:
+        return extract_visible_messages(driver, ol_element, release)
+    return parse_message_elements(ol_element)
+
+def backfill_channel_messages(driver, channel_url, max_messages=None, since=None,
+                              after_id=None, batched=True, max_stale_pages=3, page_timeout=5,
+                              ol_element=None):
+    """
+    Generator that pages upward through a channel's virtualized message list,
+    yielding messages newest -> oldest as they are rendered.
+
+    Stops when max_messages have been yielded, when a message older than
+    `since` (a datetime) is reached, when the message `after_id` (an
+    already-captured chat-messages-<id>) or anything older is reached, or
+    when max_stale_pages consecutive pages bring in nothing older (the
+    channel start). Returns (as the StopIteration value) why it stopped:
+    "caught_up", "since", "max_messages" or "start"; None if the channel
+    didn't open.
+
+    Messages are deduped by their chat-messages-<id> element id. Only the
+    oldest snowflake seen and the ids of the current window are kept, so
+    memory stays flat no matter how long the channel is.
+
+    Pass ol_element when the channel is already open in the current window.
+    """
+    if ol_element is None:
+        ol_element = open_channel(driver, channel_url)
+    if ol_element is None:
+        return
+
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
 
-    return updated_info
+    after_snowflake = message_snowflake(after_id) if after_id else None
 
-def extract_messages(driver, server_info, channel_urls):
+    emitted = 0
+    oldest_snowflake = None
+    window_ids = set()
+    stale_pages = 0
+
+    while True:
+        try:
+            # Already-read pages are only needed again for dedupe by id
+            messages = read_messages(driver, ol_element, batched, release=True)
+        except StaleElementReferenceException:
+            ol_element = driver.find_element(By.CSS_SELECTOR, "ol[data-list-id='chat-messages']")
+            continue
+
+        new_messages = []
+        for msg in messages:
+            snowflake = message_snowflake(msg.get("id"))
+            if snowflake is not None:
+                if oldest_snowflake is not None and snowflake >= oldest_snowflake:
+                    continue
+            elif msg.get("id") in window_ids:
+                continue
+            new_messages.append(msg)
+
+        window_ids = {msg.get("id") for msg in messages}
+
+        # DOM order is oldest -> newest; emit newest first so the stream
+        # runs backwards in time like the paging does.
+        for msg in reversed(new_messages):
+            snowflake = message_snowflake(msg.get("id"))
+            if after_snowflake is not None and snowflake is not None and snowflake <= after_snowflake:
+                log(f"Caught up with previously captured messages in {channel_url}.")
+                return "caught_up"
+
+            if since is not None:
+                sent_at = parse_message_timestamp(msg["timestamp"])
+                if sent_at is not None and sent_at < since:
+                    log(f"Reached cutoff {since.isoformat()} in {channel_url}.")
+                    return "since"
+
+            yield msg
+            emitted += 1
+
+            if snowflake is not None and (oldest_snowflake is None or snowflake < oldest_snowflake):
+                oldest_snowflake = snowflake
+
+            if max_messages is not None and emitted >= max_messages:
+                log(f"Reached {max_messages} messages in {channel_url}.")
+                return "max_messages"
+
+        if new_messages:
+            stale_pages = 0
+        else:
+            stale_pages += 1
+            if stale_pages >= max_stale_pages:
+                log(f"Reached the start of {channel_url} after {emitted} messages.")
+                return "start"
+
+        # Older history is fetched over the network, so wait for the first
+        # re-render rather than treating an early quiet spell as the end.
+        scroll_and_settle(driver, ol_element, "top", timeout=page_timeout, expect_change=True)
+
+def load_checkpoints(filename="discord_checkpoints.json"):
+    """
+    Load the per-channel high-water marks written by save_checkpoints.
+    Maps channel URL -> {"message_id", "timestamp", "updated_at"}.
+    """
+    try:
+        with open(filename, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        log(f"Ignoring unreadable checkpoint file {filename}: {e}")
+        return {}
+
+def save_checkpoints(checkpoints, filename="discord_checkpoints.json"):
+    """Atomically write the checkpoint store so a crash can't truncate it."""
+    tmp_filename = f"{filename}.tmp"
+    with checkpoint_lock:
+        with open(tmp_filename, "w") as file:
+            json.dump(dict(checkpoints), file, indent=4)
+        os.replace(tmp_filename, filename)
+
+# Returns the chat list once Discord has rendered at least one message into it
+CHAT_LIST_READY_JS = """
+var ol = document.querySelector("ol[data-list-id='chat-messages']");
+return ol && ol.querySelector("li[id^='chat-messages-']") ? ol : null;
+"""
+
+def collect_channel_messages(driver, channel_url, emit, ol_element=None, batched=True,
+                             backfill=False, max_messages=None, since=None, checkpoints=None):
+    """
+    Read one channel and pass each message dict to emit. If ol_element is
+    given the channel is already open in the current window and is read in
+    place; otherwise it is navigated to first.
+
+    With checkpoints, the channel's mark moves to the newest message read,
+    unless a delta read stopped before reaching the old mark (message limit,
+    cutoff date, or a list that stopped loading). The mark is then kept, so
+    the next run reads the gap again instead of skipping it.
+    """
+    checkpoint = (checkpoints or {}).get(channel_url)
+    after_id = checkpoint["message_id"] if checkpoint else None
+    newest = None
+    stop_reason = []
+
+    if backfill or after_id:
+        def read_backfill():
+            stop_reason.append((yield from backfill_channel_messages(
+                driver, channel_url,
+                max_messages=max_messages, since=since,
+                after_id=after_id, batched=batched, ol_element=ol_element
+            )))
+
+        messages = read_backfill()
+        if after_id:
+            # The delta since the checkpoint is bounded, so emit it oldest
+            # first like a normal read; a full backfill streams newest first
+            messages = list(messages)[::-1]
+    else:
+        if ol_element is None:
+            ol_element = open_channel(driver, channel_url)
+        if ol_element is None:
+            return
+
+        # 3) Parse every <li> with id starting "chat-messages-"
+        messages = read_messages(driver, ol_element, batched)
+        log(f"Found {len(messages)} message <li> elements in {channel_url}.")
+
+    for msg in messages:
+        snowflake = message_snowflake(msg.get("id"))
+        if snowflake is not None and (newest is None or snowflake > message_snowflake(newest["id"])):
+            newest = msg
+
+        emit({
+            "username": msg["username"],
+            "timestamp": msg["timestamp"],
+            "content": msg["content"],
+            "attachments": msg["attachments"]
+        })
+        record_items("extract_messages", 1)
+
+    if after_id and stop_reason != ["caught_up"]:
+        if newest is not None:
+            log(f"Stopped before the checkpoint in {channel_url}; keeping it so the next run reads the gap.")
+        return
+
+    if checkpoints is not None and newest is not None:
+        checkpoints[channel_url] = {
+            "message_id": newest["id"],
+            "timestamp": newest["timestamp"],
+            "updated_at": datetime.utcnow().isoformat()
+        }
+
+def setup_tab(driver, block_resources=False, render_profile=False):
+    """
+    Apply the CDP setup that Chrome keeps per tab (the webdriver mask,
+    blocked URLs, the render profile) to the current window. New tabs are
+    separate CDP targets, so each needs this before its first navigation.
+    """
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": """
+        Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+        window.chrome = { runtime: {} };
+        """
+    })
+
+    if block_resources:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    if render_profile:
+        driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+            "features": [{"name": "prefers-reduced-motion", "value": "reduce"}]
+        })
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": RENDER_PROFILE_JS})
+
+def open_tab(driver, url):
+    """
+    Open url in a new tab set up like the driver's first one, without
+    waiting for it to load. Returns the tab's window handle, or None.
+    """
+    known_handles = set(driver.window_handles)
+    driver.execute_script("window.open('about:blank', '_blank');")
+    new_handles = set(driver.window_handles) - known_handles
+    if not new_handles:
+        return None
+
+    handle = new_handles.pop()
+    driver.switch_to.window(handle)
+    setup_tab(driver, **tab_settings.get(driver.session_id, {}))
+    # Assigning location returns at once, so the next tabs load in parallel
+    driver.execute_script("window.location.href = arguments[0];", url)
+    return handle
+
+def harvest_channels_in_tabs(driver, channel_urls, harvest, tabs=4, timeout=30, poll_interval=0.5):
+    """
+    Open up to `tabs` channels at once in new tabs of the same (logged-in)
+    browser so their page loads overlap, then call harvest(channel_url,
+    ol_element) on whichever tab's chat list is ready first. Each tab is
+    closed after it's harvested and the next pending channel takes its place.
+    """
+    main_handle = driver.current_window_handle
+    pending = list(channel_urls)
+    open_tabs = {}
+
+    try:
+        while pending or open_tabs:
+            while pending and len(open_tabs) < tabs:
+                channel_url = pending.pop(0)
+                handle = open_tab(driver, channel_url)
+                if handle is None:
+                    log(f"Could not open a tab for {channel_url}.")
+                    continue
+                open_tabs[handle] = (channel_url, time.monotonic())
+
+            for handle, (channel_url, opened_at) in list(open_tabs.items()):
+                driver.switch_to.window(handle)
+                ol_element = driver.execute_script(CHAT_LIST_READY_JS)
+                if ol_element is None and time.monotonic() - opened_at < timeout:
+                    continue
+
+                try:
+                    # Also reached on timeout: empty channels never render a message <li>
+                    ol_element = prepare_chat_list(driver, channel_url)
+                    if ol_element is not None:
+                        harvest(channel_url, ol_element)
+                except Exception as e:
+                    log(f"Error extracting messages from {channel_url}: {e}")
+                finally:
+                    driver.close()
+                    del open_tabs[handle]
+                    driver.switch_to.window(main_handle)
+
+            if open_tabs:
+                driver.switch_to.window(main_handle)
+                time.sleep(poll_interval)
+    finally:
+        for handle in open_tabs:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(main_handle)
+
+@track_phase()
+def extract_messages(driver, server_info, channel_urls, batched=True, backfill=False,
+                     max_messages=None, since=None, sink=None, checkpoints=None, tabs=1):
     """
     Extract username, message content, timestamp, and attachments
     from each channel in channel_urls.
@@ -399,6 +1231,23 @@ def extract_messages(driver, server_info, channel_urls):
          "content": "...",
          "attachments": [...]
        }
+    With batched=True (default) all visible messages are read in a single
+    script call; batched=False falls back to per-element lookups.
+
+    With backfill=True each channel is paged upward through its history
+    (see backfill_channel_messages) instead of reading only the last screen.
+    If a sink callable is given, each message dict is passed to it as soon
+    as it's parsed instead of being accumulated in server_info['messages'].
+    Streamed messages also carry "server_id" and "channel_url", since they
+    are no longer nested under their server.
+
+    If a checkpoints dict (see load_checkpoints) is given, channels that
+    have a high-water mark are paged only until the already-captured
+    message is reached, so just the delta is emitted. The mark for each
+    channel is advanced once the channel has been read successfully.
+
+    With tabs > 1 up to that many channels are loaded concurrently in
+    separate tabs of this browser (see harvest_channels_in_tabs).
     """
     if not channel_urls:
         return []
@@ -406,202 +1255,629 @@ def extract_messages(driver, server_info, channel_urls):
     if "messages" not in server_info:
         server_info["messages"] = []
 
+    def emitter(channel_url):
+        if sink is None:
+            return server_info["messages"].append
+        return lambda message: sink({
+            "server_id": server_info.get("server_id"), "channel_url": channel_url, **message
+        })
+
+    options = {
+        "batched": batched,
+        "backfill": backfill,
+        "max_messages": max_messages,
+        "since": since,
+        "checkpoints": checkpoints
+    }
+
+    if tabs > 1:
+        harvest_channels_in_tabs(
+            driver, channel_urls,
+            lambda channel_url, ol_element: collect_channel_messages(
+                driver, channel_url, emitter(channel_url), ol_element=ol_element, **options
+            ),
+            tabs=tabs
+        )
+        return server_info
+
     for channel_url in channel_urls:
         try:
-            driver.get(channel_url)
-            # Allow Discord to load
-            time.sleep(5)
+            collect_channel_messages(driver, channel_url, emitter(channel_url), **options)
+        except Exception as e:
+            log(f"Error extracting messages from {channel_url}: {e}")
+
+    return server_info
+
+# Records every group header and member row currently rendered in the member
+# list into a page-side map (window.__memberHarvest), so the Python side only
+# has to scroll. Members rendered above the first visible header inherit the
+# last header seen on the previous pass.
+HARVEST_MEMBERS_STEP_JS = """
+var container = arguments[0];
+var listId = container.getAttribute("data-list-id");
+var state = window.__memberHarvest;
+if (!state || state.listId !== listId) {
+    state = window.__memberHarvest = {listId: listId, groups: {}, members: {}, lastHeader: null};
+}
+
+var nodes = container.querySelectorAll(
+    "h3[class*='membersGroup_'], div[class*='member_'][data-list-item-id]"
+);
+var current = state.lastHeader;
+var newGroups = 0;
+var newMembers = 0;
+for (var i = 0; i < nodes.length; i++) {
+    var node = nodes[i];
+    if (node.tagName === "H3") {
+        current = node.textContent.replace(/\\s+/g, " ").trim();
+        if (!(current in state.groups)) {
+            state.groups[current] = true;
+            newGroups++;
+        }
+        continue;
+    }
+
+    var memberId = node.getAttribute("data-list-item-id");
+    if (memberId in state.members) continue;
+
+    var usernameEl = node.querySelector("span[class*='username']");
+    var classes = String(node.className);
+    var status = "offline";
+    if (classes.indexOf("online") !== -1) status = "online";
+    else if (classes.indexOf("idle") !== -1) status = "idle";
+    else if (classes.indexOf("dnd") !== -1) status = "dnd";
+
+    state.members[memberId] = {
+        username: usernameEl ? (usernameEl.innerText || usernameEl.textContent).trim() : "",
+        status: status,
+        group: current
+    };
+    newMembers++;
+    if (window.__scraperRelease) window.__scraperRelease(node);
+}
+state.lastHeader = current;
+
+var scroller = container;
+while (scroller && scroller !== document.body && scroller.scrollHeight <= scroller.clientHeight) {
+    scroller = scroller.parentElement;
+}
+if (!scroller || scroller === document.body) scroller = container;
+
+return {
+    new_groups: newGroups,
+    new_members: newMembers,
+    members: Object.keys(state.members).length,
+    at_bottom: scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 2
+};
+"""
+
+# Returns (and clears) everything HARVEST_MEMBERS_STEP_JS collected
+COLLECT_MEMBER_HARVEST_JS = """
+var state = window.__memberHarvest || {groups: {}, members: {}};
+delete window.__memberHarvest;
+return JSON.stringify({groups: Object.keys(state.groups), members: state.members});
+"""
+
+@track_phase(items=lambda result: len(result[1]))
+def harvest_member_list(driver, server_id, target_group="Online", previous_last_active=None,
+                        max_attempts=20):
+    """
+    Single-pass replacement for extract_groups_and_online_members followed by
+    a second scroll for every member's last activity. Scrolls the member list
+    once while an in-page script records group headers, member ids, usernames
+    and status, then fetches the whole map in one payload.
+
+    Returns (members, last_active): members in the shape of
+    extract_groups_and_online_members, and last_active updated from
+    previous_last_active.
+    """
+    log("Harvesting member list (groups, members and presence)...")
+    scroll_container = open_member_list(driver, server_id)
+    container_selector = f'div[data-list-id="members-{server_id}"]'
+
+    scroll_attempts = 0
+    while scroll_attempts < max_attempts:
+        try:
+            progress = driver.execute_script(HARVEST_MEMBERS_STEP_JS, scroll_container)
+        except StaleElementReferenceException:
+            log("DOM updated, refreshing elements...")
+            scroll_container = driver.find_element(By.CSS_SELECTOR, container_selector)
+            continue
+
+        if progress["new_groups"] or progress["new_members"]:
+            scroll_attempts = 0
+        else:
+            scroll_attempts += 1
+            # Give lazily loaded rows a couple of chances once at the bottom
+            if progress["at_bottom"] and scroll_attempts >= 3:
+                break
 
+        log(f"Harvested {progress['members']} members (+{progress['new_members']}, "
+            f"+{progress['new_groups']} groups, stale {scroll_attempts}/{max_attempts})")
+
+        scroll_and_settle(driver, scroll_container, "by", 0.25, timeout=2)
+
+    payload = json.loads(driver.execute_script(COLLECT_MEMBER_HARVEST_JS))
+
+    group_counts = {}
+    header_names = {}
+    for group_text in payload["groups"]:
+        parsed = parse_group_header(group_text)
+        if not parsed:
+            log(f"⚠️ Couldn't parse group header: {group_text}")
+            continue
+        group_counts[parsed[0]] = parsed[1]
+        header_names[group_text] = parsed[0]
+
+    last_active = dict(previous_last_active or {})
+    online_list = []
+    seen_at = datetime.utcnow().isoformat()
+    for member_id, info in payload["members"].items():
+        if header_names.get(info["group"]) == target_group:
+            online_list.append({
+                "id": member_id,
+                "username": info["username"]
+            })
+
+        if (member_id not in last_active) or (last_active[member_id].get("status") != info["status"]):
+            last_active[member_id] = {
+                "username": info["username"],
+                "status": info["status"],
+                "last_seen": seen_at
+            }
+
+    members = {
+        "groups": [{"group": gname, "count": gcount} for gname, gcount in group_counts.items()],
+        "online_members": online_list
+    }
+
+    log(f"Done. Found {len(group_counts)} groups total. Extracted {len(online_list)} '{target_group}' members "
+        f"and presence for {len(payload['members'])} members.")
+    return members, last_active
+
+# --- Network capture engine ---------------------------------------------------
+# Alternative to the DOM scrapers above: Discord's client already receives
+# guilds, members and messages as JSON over its REST API and gateway socket.
+# With network logging on (see configure_driver), chromedriver records those
+# in the performance log; the functions below decode them into the same
+# server_info structure. apply_network_messages/build_server_info are pure,
+# so a recorded capture (save_network_capture) can be replayed offline.
+
+ZLIB_SUFFIX = b"\x00\x00\xff\xff"
+
+VOICE_CHANNEL_TYPES = (2, 13)
+CATEGORY_CHANNEL_TYPE = 4
+
+def new_network_state():
+    """Decoder state for one browser session (gateway inflaters, guild data)."""
+    return {
+        "sockets": {},
+        "responses": {},
+        "guilds": {},
+        "member_lists": {},
+        "presences": {},
+        "messages": {}
+    }
+
+def take_network_messages(driver):
+    """
+    Drain the performance log and return the session's buffered Network
+    messages. Bodies of finished Discord API responses are fetched now and
+    attached as params["body"], while Chrome still has them.
+    """
+    messages = take_network_log(driver)
+    fetch_response_bodies(driver, messages, lambda url: "/api/v" in url)
+    return messages
+
+def save_network_capture(messages, filename):
+    """Append captured Network messages (with bodies) to an NDJSON file for replay."""
+    with open_record_stream(filename, "ab") as stream:
+        for message in messages:
+            stream.write(encode_record(message))
+
+def load_network_capture(filename):
+    """Read a capture written by save_network_capture."""
+    return list(read_records(filename))
+
+def decode_gateway_frame(socket, response):
+    """Decode one gateway frame into zero or more JSON payloads."""
+    data = response.get("payloadData", "")
+    if response.get("opcode") == 1:
+        return [json.loads(data)]
+
+    data = base64.b64decode(data)
+    inflater = socket.get("inflater")
+    if socket["compression"] == "zlib-stream":
+        # Messages may span frames; each one ends with a zlib sync flush
+        socket["pending"] += data
+        if not socket["pending"].endswith(ZLIB_SUFFIX):
+            return []
+        data = inflater.decompress(socket["pending"])
+        socket["pending"] = b""
+    elif socket["compression"] == "zstd-stream":
+        if inflater is None:
+            return []
+        data = inflater.decompress(data)
+
+    try:
+        return [json.loads(data)]
+    except ValueError:
+        # Erlang term format or a partial zstd message; nothing we can decode
+        return []
+
+def handle_member_list_update(state, data):
+    """Apply a GUILD_MEMBER_LIST_UPDATE (the lazily synced member sidebar)."""
+    member_list = state["member_lists"].setdefault(data["guild_id"], {"groups": [], "items": {}})
+    if data.get("groups") is not None:
+        member_list["groups"] = data["groups"]
+
+    items = member_list["items"]
+    for op in data.get("ops", []):
+        if op["op"] == "SYNC":
+            start = op["range"][0]
+            for offset, item in enumerate(op.get("items", [])):
+                items[start + offset] = item
+        elif op["op"] in ("INSERT", "UPDATE"):
+            items[op["index"]] = op["item"]
+        elif op["op"] == "DELETE":
+            items.pop(op["index"], None)
+        elif op["op"] == "INVALIDATE":
+            for index in range(op["range"][0], op["range"][1] + 1):
+                items.pop(index, None)
+
+def store_guild(state, guild):
+    """Merge a guild object from READY, GUILD_CREATE or the REST API."""
+    properties = guild.get("properties") or {}
+    stored = state["guilds"].setdefault(guild["id"], {"name": "", "channels": {}, "roles": {}})
+    stored["name"] = guild.get("name") or properties.get("name") or stored["name"]
+    for channel in guild.get("channels") or []:
+        stored["channels"][channel["id"]] = channel
+    for role in guild.get("roles") or []:
+        stored["roles"][role["id"]] = role["name"]
+
+def store_message(state, message):
+    state["messages"].setdefault(message["channel_id"], {})[message["id"]] = message
+
+def handle_gateway_payload(state, payload):
+    """Update the decoder state from one gateway dispatch."""
+    event = payload.get("t")
+    data = payload.get("d") or {}
+
+    if event == "READY":
+        for guild in data.get("guilds", []):
+            store_guild(state, guild)
+    elif event == "GUILD_CREATE":
+        store_guild(state, data)
+    elif event == "GUILD_MEMBERS_CHUNK":
+        for member in data.get("members", []):
+            user = member["user"]
+            state["presences"].setdefault(user["id"], {"username": user.get("global_name") or user["username"], "status": "offline"})
+        for presence in data.get("presences", []):
+            entry = state["presences"].setdefault(presence["user"]["id"], {"username": "", "status": "offline"})
+            entry["status"] = presence.get("status", "offline")
+    elif event == "GUILD_MEMBER_LIST_UPDATE":
+        handle_member_list_update(state, data)
+    elif event == "PRESENCE_UPDATE":
+        entry = state["presences"].setdefault(data["user"]["id"], {"username": "", "status": "offline"})
+        entry["status"] = data.get("status", "offline")
+    elif event == "MESSAGE_CREATE":
+        store_message(state, data)
+
+def handle_rest_response(state, url, body):
+    """Update the decoder state from one Discord API response."""
+    path = urlparse(url).path
+    match = re.search(r"/channels/(\d+)/messages$", path)
+    if match and isinstance(body, list):
+        for message in body:
+            store_message(state, message)
+        return
+
+    match = re.search(r"/guilds/(\d+)/channels$", path)
+    if match and isinstance(body, list):
+        store_guild(state, {"id": match.group(1), "channels": body})
+        return
+
+    match = re.search(r"/guilds/(\d+)$", path)
+    if match and isinstance(body, dict):
+        store_guild(state, body)
+
+def apply_network_messages(state, messages):
+    """Feed captured CDP Network messages (live or replayed) into the state."""
+    for message in messages:
+        method = message.get("method")
+        params = message.get("params", {})
+
+        if method == "Network.webSocketCreated" and "gateway" in params.get("url", ""):
+            url = params["url"]
+            socket = {"compression": None, "pending": b"", "inflater": None}
+            if "compress=zlib-stream" in url:
+                socket["compression"] = "zlib-stream"
+                socket["inflater"] = zlib.decompressobj()
+            elif "compress=zstd-stream" in url:
+                socket["compression"] = "zstd-stream"
+                if zstandard is not None:
+                    socket["inflater"] = zstandard.ZstdDecompressor().decompressobj()
+            state["sockets"][params["requestId"]] = socket
+
+        elif method == "Network.webSocketFrameReceived" and params.get("requestId") in state["sockets"]:
             try:
-                # 1) Wait for <ol data-list-id="chat-messages"> to appear
-                ol_element = WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "ol[data-list-id='chat-messages']")
-                    )
-                )
-                log("Located the <ol data-list-id='chat-messages'> element.")
-            except TimeoutException:
-                log(f"Timed out waiting for chat-messages <ol> in {channel_url}.")
+                payloads = decode_gateway_frame(state["sockets"][params["requestId"]], params["response"])
+            except (zlib.error, ValueError) as e:
+                log(f"Could not decode gateway frame: {e}")
                 continue
+            for payload in payloads:
+                handle_gateway_payload(state, payload)
 
-            # 2) Scroll to bottom to see the newest messages
-            driver.execute_script(
-                "arguments[0].scrollTop = arguments[0].scrollHeight",
-                ol_element
-            )
-            time.sleep(2)
-
-            # 3) Find all <li> with id starting "chat-messages-"
-            message_elements = ol_element.find_elements(
-                By.CSS_SELECTOR,
-                "li[id^='chat-messages-']"
-            )
-            log(f"Found {len(message_elements)} message <li> elements in {channel_url}.")
+        elif method == "Network.responseReceived" and "/api/v" in params.get("response", {}).get("url", ""):
+            state["responses"][params["requestId"]] = params["response"]["url"]
 
-            # 4) Parse each message
-            for msg_el in message_elements:
+        elif method == "Network.loadingFinished" and "body" in params:
+            url = state["responses"].pop(params["requestId"], None)
+            if url:
                 try:
-                    username = "Unknown"
-                    timestamp = "Unknown"
-                    content = ""
-                    attachments = []
-
-                    # --- Extract Username (Two-step fallback) ---
-                    try:
-                        username_el = msg_el.find_element(
-                            By.CSS_SELECTOR,
-                            "span[id^='message-username-'], span[class*='username_']"
-                        )
-                        username = username_el.text.strip()
-                    except NoSuchElementException:
-                        try:
-                            heading_el = msg_el.find_element(By.CSS_SELECTOR, "h3[class*='header_']")
-                            possible_user_el = heading_el.find_element(By.CSS_SELECTOR, "span[class*='username_']")
-                            username = possible_user_el.text.strip()
-                        except NoSuchElementException:
-                            pass
-
-                    # --- Extract Timestamp ---
-                    # We try .datetime first, then fallback to .aria-label
-                    try:
-                        time_el = msg_el.find_element(By.CSS_SELECTOR, "time")
-                        datetime_attr = time_el.get_attribute("datetime")
-                        aria_label = time_el.get_attribute("aria-label")
-
-                        # If the <time> tag doesn't have datetime, use aria-label
-                        if datetime_attr:
-                            timestamp = datetime_attr
-                        elif aria_label:
-                            timestamp = aria_label
-                        else:
-                            timestamp = "Unknown"
-                    except NoSuchElementException:
-                        pass
-
-                    # --- Extract Content ---
-                    try:
-                        content_el = msg_el.find_element(
-                            By.CSS_SELECTOR,
-                            "div[id^='message-content.'], div[class*='messageContent_']"
-                        )
-                        content = content_el.text.strip()
-                    except NoSuchElementException:
-                        pass
-
-                    image_els = msg_el.find_elements(By.CSS_SELECTOR, "img")
-                    for img_el in image_els:
-                        src = img_el.get_attribute("src")
-                        if src and "cdn.discordapp.com" in src:
-                            attachments.append(src)
-
-                    server_info["messages"].append({
-                        "username": username,
-                        "timestamp": timestamp,
-                        "content": content,
-                        "attachments": attachments
-                    })
-
-                except Exception as ex:
-                    log(f"Skipping one message due to error: {ex}")
+                    handle_rest_response(state, url, json.loads(params["body"]))
+                except ValueError:
+                    pass
+
+def member_list_group_name(guild, group_id):
+    if group_id in ("online", "offline"):
+        return group_id.capitalize()
+    return guild["roles"].get(group_id, group_id)
+
+def build_server_info(state, server_url, channel_urls=[], target_group="member"):
+    """Assemble the DOM scraper's server_info structure from decoded traffic."""
+    server_id = extract_server_id(server_url)
+    guild = state["guilds"].get(server_id, {"name": "", "channels": {}, "roles": {}})
+    base_url = server_url.rsplit("/", 1)[0]
+
+    # Channels grouped under their categories, in sidebar order
+    channels = sorted(guild["channels"].values(), key=lambda c: (c.get("position", 0), c["id"]))
+    categories = {c["id"]: c for c in channels if c.get("type") == CATEGORY_CHANNEL_TYPE}
+    tree = {}
+    for channel in channels:
+        if channel.get("type") == CATEGORY_CHANNEL_TYPE:
+            continue
+        category = categories.get(channel.get("parent_id"))
+        tree.setdefault(category["name"] if category else None, []).append({
+            "name": channel.get("name", ""),
+            "id": f"channels___{channel['id']}",
+            "url": f"{base_url}/{server_id}/{channel['id']}",
+            "type": "voice" if channel.get("type") in VOICE_CHANNEL_TYPES else "text"
+        })
+    category_order = [None] + [c["name"] for c in sorted(categories.values(), key=lambda c: c.get("position", 0))]
+    channel_tree = [
+        {"category": name, "channels": tree[name]}
+        for name in category_order if name in tree
+    ]
 
-        except Exception as e:
-            log(f"Error extracting messages from {channel_url}: {e}")
+    # Member groups, target-group members and presence
+    member_list = state["member_lists"].get(server_id, {"groups": [], "items": {}})
+    groups = [
+        {"group": member_list_group_name(guild, group["id"]), "count": group.get("count", 0)}
+        for group in member_list["groups"]
+    ]
+    online_members = []
+    last_active = {}
+    seen_at = datetime.utcnow().isoformat()
+    current_group = None
+    for index in sorted(member_list["items"]):
+        item = member_list["items"][index]
+        if "group" in item:
+            current_group = member_list_group_name(guild, item["group"]["id"])
+            continue
+
+        member = item.get("member") or {}
+        user = member.get("user") or {}
+        if not user:
+            continue
+        # Same ids as the DOM's data-list-item-id, so both engines' last_active maps line up
+        member_id = f"members-{server_id}-{user['id']}"
+        username = member.get("nick") or user.get("global_name") or user.get("username", "")
+        status = (member.get("presence") or {}).get("status", "offline")
+        if current_group == target_group:
+            online_members.append({"id": member_id, "username": username})
+        last_active[member_id] = {"username": username, "status": status, "last_seen": seen_at}
+
+    for user_id, presence in state["presences"].items():
+        member_id = f"members-{server_id}-{user_id}"
+        if member_id not in last_active and presence["username"]:
+            last_active[member_id] = {"username": presence["username"], "status": presence["status"], "last_seen": seen_at}
+
+    # Messages for the requested channels, oldest first
+    messages = []
+    for channel_url in channel_urls:
+        channel_messages = state["messages"].get(extract_server_id(channel_url), {})
+        for message in sorted(channel_messages.values(), key=lambda m: int(m["id"])):
+            author = message.get("author") or {}
+            messages.append({
+                "username": author.get("global_name") or author.get("username", "Unknown"),
+                "timestamp": message.get("timestamp", "Unknown"),
+                "content": message.get("content", ""),
+                "attachments": [attachment["url"] for attachment in message.get("attachments", [])]
+            })
+
+    return {
+        "server_name": guild["name"],
+        "server_id": server_id,
+        "channels": channel_tree,
+        "members": {"groups": groups, "online_members": online_members},
+        "messages": messages,
+        "last_active": last_active
+    }
 
-    return server_info
+def replay_network_capture(filename, server_url, channel_urls=[], target_group="member"):
+    """Build server_info from a recorded capture, without a browser."""
+    state = new_network_state()
+    apply_network_messages(state, load_network_capture(filename))
+    return build_server_info(state, server_url, channel_urls, target_group)
 
-def extract_last_active(driver, server_id, previous_last_active={}):
+@profile_target(lambda driver, server_url, *args: server_url)
+@track_phase(name="scrape_server_data", items=lambda result: 1)
+def scrape_server_data_from_network(driver, server_url, username, password, channel_urls=[],
+                                    message_pages=1, capture_file=None, max_member_scrolls=50):
     """
-    Extracts last active times for all users, including offline members.
-    Uses incremental scrolling with DOM tracking to ensure full coverage.
+    Network-engine counterpart of scrape_server_data. The browser is only
+    driven so that Discord fetches the data (open the server, scroll the
+    member list, open each channel and page up `message_pages` times); the
+    results are decoded from the captured traffic instead of the DOM.
+    If capture_file is given, the raw traffic is appended to it for replay.
+
+    Chrome drops a document's response bodies once the next navigation
+    commits, so the traffic is collected after every page, before moving on.
     """
-    log("Extracting last active times for all members...")
-    last_active = previous_last_active.copy()
-    scroll_attempts = 0
-    max_scroll_attempts = 15
-    last_count = 0
-    unique_member_ids = set()
-
     try:
-        # Locate member list container
-        container_selector = f'div[data-list-id="members-{server_id}"]'
-        scroll_container = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, container_selector))
-        )
-    except Exception as e:
-        log(f"Member list container error: {e}")
-        return last_active
+        ensure_logged_in(driver, username, password)
+        state = network_states.setdefault(driver.session_id, new_network_state())
+        event_count = 0
+
+        def capture():
+            nonlocal event_count
+            messages = take_network_messages(driver)
+            if capture_file:
+                save_network_capture(messages, capture_file)
+            apply_network_messages(state, messages)
+            event_count += len(messages)
+
+        log(f"Accessing server: {server_url}")
+        driver.get(server_url)
+        wait_for_page_ready(driver)
 
-    while scroll_attempts < max_scroll_attempts:
+        # Scrolling the sidebar makes the client subscribe to more member ranges
         try:
-            members = WebDriverWait(scroll_container, 10).until(
-                EC.presence_of_all_elements_located(
-                    (By.XPATH, ".//div[contains(@class, 'member_') and @data-list-item-id]")
-                )
-            )
-            current_count = len(members)
-            
-            for member in members:
-                try:
-                    member_id = member.get_attribute("data-list-item-id")
-                    if member_id in unique_member_ids:
-                        continue
-                        
-                    unique_member_ids.add(member_id)
-                    
-                    username = member.find_element(
-                        By.XPATH, ".//span[contains(@class, 'username')]"
-                    ).text.strip()
-
-                    status_classes = member.get_attribute("class")
-                    if "online" in status_classes:
-                        status = "online"
-                    elif "idle" in status_classes:
-                        status = "idle"
-                    elif "dnd" in status_classes:
-                        status = "dnd"
-                    else:
-                        status = "offline"
-
-                    if (member_id not in last_active) or (last_active[member_id].get("status") != status):
-                        last_active[member_id] = {
-                            "username": username,
-                            "status": status,
-                            "last_seen": datetime.utcnow().isoformat()
-                        }
+            scroll_container = open_member_list(driver, extract_server_id(server_url))
+            for _ in range(max_member_scrolls):
+                if not scroll_and_settle(driver, scroll_container, "by", 1.0, timeout=2, expect_change=True):
+                    break
+        except Exception as e:
+            log(f"Member list not scrolled: {e}")
+        capture()
 
-                except Exception as e:
-                    log(f"Skipping member processing: {e}")
-
-            if current_count == last_count:
-                scroll_attempts += 1
-                log(f"No new members ({scroll_attempts}/{max_scroll_attempts})")
-            else:
-                scroll_attempts = 0
-                last_count = current_count
-
-            driver.execute_script(
-                "arguments[0].scrollTop += arguments[0].clientHeight * 0.25", 
-                scroll_container
+        for channel_url in channel_urls:
+            ol_element = open_channel(driver, channel_url)
+            for _ in range(message_pages if ol_element is not None else 0):
+                if not scroll_and_settle(driver, ol_element, "top", timeout=5, expect_change=True):
+                    break
+            capture()
+
+        log(f"Decoded {event_count} network events")
+
+        return build_server_info(state, server_url, channel_urls)
+
+    except Exception as e:
+        print(f"Scraping failed: {str(e)}")
+        return None
+
+def make_worker_driver(slot, base_port=9222, user_data_dir=None):
+    """Give every pool slot its own debugging port and Chrome profile."""
+    worker_dir = os.path.join(user_data_dir, f"worker-{slot}") if user_data_dir else None
+    return configure_driver(user_data_dir=worker_dir, debugging_port=base_port + slot)
+
+def scrape_servers_parallel(server_urls, email, password, channel_urls=[], checkpoints=None,
+                            workers=1, base_port=9222, user_data_dir=None, tabs=1, sink=None,
+                            backfill=False, max_messages=None, since=None, message_sink=None):
+    """
+    Spread server_urls across a pool of `workers` Chrome instances.
+    Returns the scraped server_info dicts (failed servers are dropped).
+    If a sink callable is given, each server_info is handed to it as soon as
+    the server finishes and is not kept in the returned list.
+    backfill, max_messages, since and message_sink go to scrape_server_data.
+    """
+    log(f"Scraping {len(server_urls)} servers with {workers} worker(s)")
+
+    def scrape(driver, server_url):
+        if scrape_engine == "network":
+            server_data = scrape_server_data_from_network(
+                driver, server_url, email, password, channel_urls, capture_file=network_capture_file
             )
-            time.sleep(1.5)
+        else:
+            server_data = scrape_server_data(
+                driver, server_url, email, password, channel_urls, checkpoints, tabs,
+                backfill=backfill, max_messages=max_messages, since=since, message_sink=message_sink
+            )
+        if server_data and sink is not None:
+            sink(server_data)
+        if server_data and checkpoints is not None:
+            save_checkpoints(checkpoints)
 
-        except StaleElementReferenceException:
-            log("DOM updated, refreshing elements...")
-            scroll_container = driver.find_element(By.CSS_SELECTOR, container_selector)
-            
-        except Exception as e:
-            log(f"Scroll iteration error: {e}")
-            break
+        time.sleep(random.uniform(3, 7))
+        return None if sink is not None else server_data
+
+    results = run_with_driver_pool(
+        scrape, server_urls, workers,
+        lambda slot: make_worker_driver(slot, base_port, user_data_dir)
+    )
+    return [server_data for server_data in results if server_data]
 
-    log(f"Processed {len(unique_member_ids)} members with {scroll_attempts} stale scrolls")
-    return last_active
+def encode_record(record):
+    """Serialize one record as a compact JSON line (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
 
-def save_to_file(data, filename="discord_data.json"):
+def open_record_stream(filename, mode="ab"):
+    """
+    Open a binary stream for NDJSON records. Compression follows the
+    extension: '.gz' uses gzip, '.zst' uses zstandard (optional dependency),
+    anything else is written as plain text.
+    """
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode)
+    if filename.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required for .zst output (pip install zstandard)")
+        raw = open(filename, mode)
+        if "r" in mode:
+            return io.BufferedReader(
+                zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+            )
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return open(filename, mode)
+
+def write_record(stream, record):
+    """Append one record and flush it so a crash never loses finished work."""
+    line = encode_record(record)
+    with output_lock:
+        stream.write(line)
+        stream.flush()
+
+def read_records(filename):
+    """Yield records from an NDJSON stream, tolerating a truncated last line."""
+    with open_record_stream(filename, "rb") as stream:
+        try:
+            for line in stream:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    log(f"Skipping truncated record in {filename}")
+        except EOFError:
+            log(f"{filename} ends mid-stream; keeping the records before the break")
+
+def finalize_records(stream_filename, filename="discord_data.json"):
+    """
+    Convert an NDJSON stream into an indented JSON array (the
+    discord_data.json format), one record at a time so memory stays flat.
+    """
+    count = 0
     with open(filename, "w") as file:
-        json.dump(data, file, indent=4)
-    print(f"Data saved to {filename}")
+        file.write("[")
+        for record in read_records(stream_filename):
+            file.write(",\n" if count else "\n")
+            file.write(json.dumps(record, indent=4))
+            count += 1
+        file.write("\n]\n" if count else "]\n")
+    print(f"Data saved to {filename} ({count} records)")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Discord servers")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each server (Python samples + Chrome trace)")
+    parser.add_argument("--profile-dir", default="profiles")
+    args = parser.parse_args()
+    if args.profile:
+        scraper_common.profiling_dir = args.profile_dir
+
     # Provide your credentials here
     EMAIL = discord_email
     PASSWORD = discord_password
@@ -614,20 +1890,32 @@ if __name__ == "__main__":
         "",
     ]
 
-    driver = configure_driver()
+    # With incremental sync each run only captures messages newer than the
+    # checkpoints and appends them to the stream, so the final JSON holds
+    # every run; otherwise each run starts a fresh stream
+    checkpoints = load_checkpoints() if incremental_sync else None
+
+    # Each server is written to the NDJSON stream as soon as it finishes
+    stream = open_record_stream(output_stream_file, "ab" if incremental_sync else "wb")
+    # Messages can go to their own stream as they're read, so long backfills
+    # are never held in memory
+    message_stream = None
+    if messages_stream_file:
+        message_stream = open_record_stream(messages_stream_file, "ab" if incremental_sync else "wb")
     try:
-        for server_url in server_urls:
-            
-            server_data = scrape_server_data(driver, server_url, EMAIL, PASSWORD, channel_urls)
-            if server_data:
-                data.append(server_data)
-            
-            time.sleep(random.uniform(3, 7))
-        
-        print("All server data extracted successfully")
-        print(data)
-        save_to_file(data)
-        
+        scrape_servers_parallel(
+            server_urls, EMAIL, PASSWORD, channel_urls, checkpoints,
+            workers=scraper_workers, user_data_dir=discord_user_data_dir, tabs=channel_tabs,
+            sink=lambda server_data: write_record(stream, server_data),
+            backfill=message_backfill, max_messages=max_channel_messages, since=messages_since,
+            message_sink=(lambda message: write_record(message_stream, message)) if message_stream else None
+        )
     finally:
-        driver.quit()
+        stream.close()
+        if message_stream:
+            message_stream.close()
+
+    print("All server data extracted successfully")
+    finalize_records(output_stream_file)
+    save_metrics(metrics_json_file, metrics_prom_file, "discord")
 
@@ -0,0 +1,107 @@
+"""
+Engagement statistics for scraped Instagram profiles, computed with NumPy.
+
+Count strings as Instagram renders them ("1,234", "1.2K", "1,2K", "3M") are
+parsed in bulk into integer arrays, and per-profile statistics are computed
+for many profiles at once by padding their posts into one NaN-filled matrix:
+
+    stats = engagement_stats(likes, comments, followers, taken_at)
+
+where likes/comments/taken_at hold one sequence per profile and followers one
+count per profile. Each entry of the result is an array with one value per
+profile, keyed by its output column name (see ANALYTICS_COLUMNS).
+"""
+import warnings
+import numpy as np
+
+# Output columns added to each profile row
+ANALYTICS_COLUMNS = [
+    "median engagement",
+    "25th percentile engagement",
+    "75th percentile engagement",
+    "90th percentile engagement",
+    "engagement rate",
+    "posting cadence days",
+]
+
+COUNT_SUFFIXES = (("K", 1e3), ("M", 1e6), ("B", 1e9))
+
+def parse_counts(texts):
+    """
+    Parse count strings into an int64 array. A comma followed by a suffix is
+    a decimal separator ("1,2K" is 1200); without a suffix it groups
+    thousands ("1,234"). Anything unparseable ("N/A", "") becomes 0.
+    """
+    text = np.asarray(texts, dtype=str)
+    if text.size == 0:
+        # np.char's string ops fail on empty arrays under NumPy 2
+        return np.zeros(text.shape, np.int64)
+    text = np.char.upper(np.char.replace(text, " ", ""))
+    multiplier = np.ones(text.shape)
+    for suffix, factor in COUNT_SUFFIXES:
+        has_suffix = np.char.endswith(text, suffix)
+        multiplier[has_suffix] = factor
+        text = np.where(has_suffix, np.char.rstrip(text, suffix), text)
+
+    text = np.where(multiplier > 1, np.char.replace(text, ",", "."), np.char.replace(text, ",", ""))
+    valid = np.char.isdigit(np.char.replace(text, ".", "", count=1))
+
+    values = np.zeros(text.shape)
+    values[valid] = text[valid].astype(np.float64)
+    # rint, so 4.1K is 4100 rather than 4099.999...
+    return np.rint(values * multiplier).astype(np.int64)
+
+def pad_ragged(sequences):
+    """Stack sequences of different lengths into a float matrix padded with NaN."""
+    # At least one column, so reductions over rows without data give NaN instead of failing
+    width = max([1] + [len(sequence) for sequence in sequences])
+    matrix = np.full((len(sequences), width), np.nan)
+    for row, sequence in enumerate(sequences):
+        matrix[row, :len(sequence)] = sequence
+    return matrix
+
+def engagement_stats(likes, comments, followers, taken_at=None):
+    """
+    Per-profile statistics over likes + comments of each post:
+    median, 25th/75th/90th percentiles, engagement rate (mean engagement as
+    a percentage of followers) and posting cadence (median days between
+    consecutive posts, from Unix timestamps). Values that can't be computed
+    (no posts, no followers, fewer than two timestamps) are NaN.
+    """
+    engagement = pad_ragged(likes) + pad_ragged(comments)
+    followers = np.asarray(followers, dtype=np.float64)
+
+    # Rows without posts (or timestamps) are all NaN; their result is NaN too
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(engagement, axis=1)
+        p25, p75, p90 = np.nanpercentile(engagement, [25, 75, 90], axis=1)
+        mean = np.nanmean(engagement, axis=1)
+        rate = np.where(followers > 0, mean / np.where(followers > 0, followers, 1) * 100, np.nan)
+
+        cadence = np.full(len(likes), np.nan)
+        if taken_at is not None:
+            # Newest first, NaN padding kept at the end of each row
+            stamps = -np.sort(-pad_ragged(taken_at), axis=1)
+            if stamps.shape[1] > 1:
+                cadence = np.nanmedian(-np.diff(stamps, axis=1), axis=1) / 86400
+
+    return dict(zip(ANALYTICS_COLUMNS, (median, p25, p75, p90, rate, cadence)))
+
+def profile_analytics(likes_comments, followers):
+    """
+    Analytics columns for one scraped profile. likes_comments is the list
+    of {"likes", "comments"[, "taken_at"]} dicts; followers is the header's
+    count string. NaN comes back as "" so the CSV cell stays blank.
+    """
+    taken_at = [item["taken_at"] for item in likes_comments if item.get("taken_at")]
+    stats = engagement_stats(
+        [[item["likes"] for item in likes_comments]],
+        [[item["comments"] for item in likes_comments]],
+        parse_counts([followers]),
+        [taken_at]
+    )
+    return {
+        column: "" if np.isnan(values[0]) else round(float(values[0]), 2)
+        for column, values in stats.items()
+    }
@@ -1,6 +1,16 @@
 import os
+import io
 import csv
+import gzip
+import sys
+import re
 import time
+import argparse
+import json
+import sqlite3
+import queue
+import threading
+from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -8,11 +18,61 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
+from engagement_analytics import ANALYTICS_COLUMNS, parse_counts, profile_analytics
+from post_fetcher import INSTAGRAM_BASE_URL, fetch_post_metadata, post_shortcode
+
+# Code shared with the Discord scraper
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import scraper_common
+from scraper_common import (
+    track_phase, instrument_driver, save_metrics, profile_target,
+    TRACE_CATEGORIES, enable_network_capture, take_network_log, fetch_response_bodies,
+    run_with_driver_pool
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 load_dotenv()
 
+browser_headless = (os.getenv("SCRAPER_HEADLESS") or "").lower() in ("1", "true", "yes")
+browser_window_size = os.getenv("SCRAPER_WINDOW_SIZE")
+browser_block_resources = (os.getenv("SCRAPER_BLOCK_RESOURCES") or "").lower() in ("1", "true", "yes")
+engagement_source = os.getenv("INSTAGRAM_ENGAGEMENT") or "hover"
+http_fetch_workers = int(os.getenv("INSTAGRAM_HTTP_WORKERS") or 8)
+session_cache_file = os.getenv("INSTAGRAM_SESSION_FILE") or "instagram_session.json"
+result_cache_file = os.getenv("INSTAGRAM_CACHE_FILE") or "instagram_cache.db"
+result_cache_ttl = float(os.getenv("INSTAGRAM_CACHE_TTL") or 24 * 3600)
+
+# URL patterns dropped by the lean browsing profile: the shared ones plus
+# Instagram's and Meta's logging endpoints
+BLOCKED_URL_PATTERNS = scraper_common.BLOCKED_URL_PATTERNS + [
+    "*facebook.com/tr*", "*/logging_client_events*", "*/ajax/bz*",
+]
+
+# Fixed output schema, so rows with missing keys still line up
+CSV_COLUMNS = [
+    "profile url",
+    "user name",
+    "user image",
+    "bio",
+    "number of posts",
+    "number of followers",
+    "number of following",
+    "last 50 posts",
+    "average engagement",
+] + ANALYTICS_COLUMNS
+
+output_lock = threading.RLock()
+session_cache_lock = threading.Lock()
+result_cache_lock = threading.Lock()
+
+@track_phase()
 def login_instagram(driver, username, password):
     """
     Logs into Instagram using the provided username and password.
@@ -53,49 +113,207 @@ def login_instagram(driver, username, password):
         print(f"Login failed: {e}")
         raise
 
-def scroll_to_load_posts(driver, target_post_count=50):
+# Records /p/ links in load order as the grid inserts them. The first call
+# installs a MutationObserver that appends each new href to
+# window.__postLinks; every call then scrolls to the bottom and resolves as
+# soon as links past the cursor exist (or after timeoutMs), returning only
+# those new links, capped at `limit`.
+COLLECT_POST_LINKS_JS = """
+var limit = arguments[0];
+var timeoutMs = arguments[1];
+var done = arguments[arguments.length - 1];
+
+var state = window.__postLinks;
+if (!state) {
+    state = window.__postLinks = {seen: {}, order: [], cursor: 0};
+    state.record = function (root) {
+        var anchors = root.querySelectorAll ? root.querySelectorAll("a[href*='/p/']") : [];
+        if (root.matches && root.matches("a[href*='/p/']")) anchors = [root];
+        for (var i = 0; i < anchors.length; i++) {
+            var href = anchors[i].href;
+            if (href && !state.seen[href]) {
+                state.seen[href] = true;
+                state.order.push(href);
+            }
+        }
+    };
+    state.record(document);
+    state.observer = new MutationObserver(function (mutations) {
+        for (var i = 0; i < mutations.length; i++) {
+            var added = mutations[i].addedNodes;
+            for (var j = 0; j < added.length; j++) {
+                if (added[j].nodeType === 1) state.record(added[j]);
+            }
+        }
+    });
+    state.observer.observe(document.body, {childList: true, subtree: true});
+}
+
+var startHeight = document.body.scrollHeight;
+var finished = false;
+
+function finish() {
+    if (finished) return;
+    finished = true;
+    clearInterval(poll);
+    clearTimeout(cap);
+    var end = Math.min(state.order.length, limit);
+    var fresh = state.order.slice(state.cursor, end);
+    state.cursor = Math.max(state.cursor, end);
+    if (state.cursor >= limit) {
+        state.observer.disconnect();
+        delete window.__postLinks;
+    }
+    done({links: fresh, grew: document.body.scrollHeight !== startHeight});
+}
+
+if (state.order.length > state.cursor) {
+    finish();
+} else {
+    window.scrollTo(0, document.body.scrollHeight);
+    var poll = setInterval(function () {
+        if (state.order.length > state.cursor) finish();
+    }, 50);
+    var cap = setTimeout(finish, timeoutMs);
+}
+"""
+
+INSTAGRAM_HOME_URL = "https://www.instagram.com/"
+
+def export_session_cookies(driver):
+    """Return the logged-in browser's cookie jar, for sharing with other browsers."""
+    return driver.get_cookies()
+
+def session_cookies_expired(cookies):
+    """True if the jar has no sessionid cookie, or it has passed its expiry."""
+    for cookie in cookies:
+        if cookie.get("name") == "sessionid":
+            return "expiry" in cookie and cookie["expiry"] <= time.time()
+    return True
+
+@track_phase()
+def import_session_cookies(driver, cookies):
+    """
+    Load a cookie jar exported by export_session_cookies into this browser,
+    so it shares that login without going through login_instagram.
+    """
+    # Cookies can only be set for the open domain; robots.txt is the cheapest page on it
+    driver.get(f"{INSTAGRAM_HOME_URL}robots.txt")
+    for cookie in cookies:
+        cookie = {key: value for key, value in cookie.items() if key in (
+            "name", "value", "domain", "path", "secure", "httpOnly", "expiry", "sameSite"
+        )}
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"Could not set cookie {cookie.get('name')}: {e}")
+    driver.get(INSTAGRAM_HOME_URL)
+
+def is_logged_in(driver, timeout=5):
+    """
+    Check the page that's open (normally the homepage): an authenticated
+    browser shows the feed, an expired session shows the login form or is
+    sent to /accounts/login.
+    """
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: '/accounts/login' in d.current_url
+            or d.find_elements(By.NAME, "username")
+            or d.find_elements(By.XPATH, "//div[contains(@class,'x1q0g3np')]")
+        )
+    except TimeoutException:
+        return False
+    return '/accounts/login' not in driver.current_url and not driver.find_elements(By.NAME, "username")
+
+def load_session_cache(filename=session_cache_file):
+    """Load the saved cookie jars, keyed by Instagram username."""
+    try:
+        with open(filename, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Ignoring unreadable session file {filename}: {e}")
+        return {}
+
+def save_session_cache(username, cookies, filename=session_cache_file):
+    """
+    Atomically store one account's cookie jar in the session file. The
+    cookies are live credentials, so the file is readable by its owner only.
+    """
+    tmp_filename = f"{filename}.tmp"
+    with session_cache_lock:
+        sessions = load_session_cache(filename)
+        sessions[username] = cookies
+        with os.fdopen(os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+            # O_CREAT's mode doesn't apply to a leftover tmp file
+            os.chmod(tmp_filename, 0o600)
+            json.dump(sessions, file)
+        os.replace(tmp_filename, filename)
+
+def ensure_logged_in(driver, username, password, cookies=None, filename=session_cache_file):
+    """
+    Log in only when needed. The given cookie jar, or else the one saved for
+    this account in the session file, is restored first and checked with one
+    homepage load; the login form is only used when that session has expired.
+    Returns the browser's (possibly new) cookie jar.
+    """
+    if cookies is None and filename:
+        cookies = load_session_cache(filename).get(username)
+
+    if cookies and not session_cookies_expired(cookies):
+        import_session_cookies(driver, cookies)
+        if is_logged_in(driver):
+            print(f"Reusing saved Instagram session for {username}")
+            return cookies
+        print(f"Saved session for {username} has expired")
+
+    login_instagram(driver, username, password)
+    cookies = export_session_cookies(driver)
+    if filename:
+        save_session_cache(username, cookies, filename)
+    return cookies
+
+@track_phase(items=len)
+def scroll_to_load_posts(driver, target_post_count=50, timeout=5, max_stale=2):
     """
     Scrolls the page to load more posts dynamically.
     Stops when the target number of posts is loaded or no new posts are found.
+
+    An in-page collector records post links as the grid inserts them, so each
+    step returns only the new links (in load order) and moves on as soon as
+    they render; `timeout` is the longest a step waits for the next batch.
+    Loading stops after `max_stale` steps with no new links or page growth.
     """
-    SCROLL_PAUSE_TIME = 5
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    post_links_set = set()
-    
+    # A fresh page load drops the previous profile's collector with the document
+    driver.execute_script(
+        "if (window.__postLinks) { window.__postLinks.observer.disconnect(); delete window.__postLinks; }"
+    )
+    post_links = []
+    stale_steps = 0
+
     print(f"Starting to load posts. Target post count: {target_post_count}")
-    
-    while len(post_links_set) < target_post_count:
-        # Scroll to the bottom of the page
-        print("Scrolling to the bottom of the page...")
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(SCROLL_PAUSE_TIME)
-        
-        # Find all post links
-        print("Searching for post links...")
-        post_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/p/')]")
-        initial_count = len(post_links_set)
-        
-        for link in post_links:
-            href = link.get_attribute("href")
-            if href:
-                post_links_set.add(href)
-        
-        current_count = len(post_links_set)
-        print(f"Posts loaded so far: {current_count} (Found {current_count - initial_count} new posts this iteration)")
-        
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            print("No more posts to load. Stopping.")
-            break
-        
-        last_height = new_height
-    
-    print(f"Finished loading posts. Total posts loaded: {len(post_links_set)}")
-    if len(post_links_set) < target_post_count:
-        print(f"Warning: Only {len(post_links_set)} posts were loaded, which is less than the target of {target_post_count}.")
-    
-    return list(post_links_set)[:target_post_count]
 
+    while len(post_links) < target_post_count:
+        step = driver.execute_async_script(COLLECT_POST_LINKS_JS, target_post_count, int(timeout * 1000))
+        post_links.extend(step["links"])
+        print(f"Posts loaded so far: {len(post_links)} (Found {len(step['links'])} new posts this iteration)")
+
+        if step["links"] or step["grew"]:
+            stale_steps = 0
+        else:
+            stale_steps += 1
+            if stale_steps >= max_stale:
+                print("No more posts to load. Stopping.")
+                break
+
+    print(f"Finished loading posts. Total posts loaded: {len(post_links)}")
+    if len(post_links) < target_post_count:
+        print(f"Warning: Only {len(post_links)} posts were loaded, which is less than the target of {target_post_count}.")
+
+    return post_links[:target_post_count]
+
+@track_phase(items=len)
 def scrape_engagement_by_hover(driver, post_urls):
     """
     Scrapes likes and comments by hovering over each post thumbnail.
@@ -144,21 +362,132 @@ def scrape_engagement_by_hover(driver, post_urls):
 
                 if retries == 0:
                     print(f"Failed to process post after multiple retries: {post_url}")
-                    likes_comments.append({"url": post_url, "likes": 0, "comments": 0})
+                    # Placeholder counts; "failed" keeps them out of the result cache
+                    likes_comments.append({"url": post_url, "likes": 0, "comments": 0, "failed": True})
                     break
 
     return likes_comments
 
-def convert_to_number(text):
-    try:
-        if "k" in text.lower():
-            return int(float(text.lower().replace("k", "")) * 1000)
-        elif "m" in text.lower():
-            return int(float(text.lower().replace("m", "")) * 1000000)
+# --- Network engagement capture ----------------------------------------------
+# The grid's own XHR/GraphQL responses carry like and comment counts for every
+# post they load. With INSTAGRAM_ENGAGEMENT=network, chromedriver records those
+# responses in the performance log (see configure_driver) while
+# scroll_to_load_posts runs, and engagement is read from them instead of by
+# hovering each thumbnail.
+
+# Responses that list posts: the profile GraphQL queries and the feed API
+ENGAGEMENT_URL_PATTERNS = ("/graphql/query", "/api/graphql", "/api/v1/feed/user/", "/api/v1/users/web_profile_info")
+
+def take_response_bodies(driver):
+    """
+    Drain the performance log and return the bodies of the post-listing
+    responses that finished since the last call, fetched while Chrome still
+    has them.
+    """
+    return fetch_response_bodies(
+        driver, take_network_log(driver),
+        lambda url: any(pattern in url for pattern in ENGAGEMENT_URL_PATTERNS)
+    )
+
+def extract_post_engagement(payload, found=None):
+    """
+    Walk a decoded response and collect {shortcode: {"likes", "comments"}}
+    (plus "taken_at" when the response has it) for every post object in it. Handles both the GraphQL shape
+    (edge_liked_by / edge_media_to_comment) and the API shape
+    (like_count / comment_count).
+    """
+    if found is None:
+        found = {}
+
+    if isinstance(payload, dict):
+        shortcode = payload.get("shortcode") or payload.get("code")
+        likes = payload.get("like_count")
+        if likes is None:
+            likes = (payload.get("edge_liked_by") or payload.get("edge_media_preview_like") or {}).get("count")
+        comments = payload.get("comment_count")
+        if comments is None:
+            comments = (payload.get("edge_media_to_comment") or {}).get("count")
+        if isinstance(shortcode, str) and likes is not None:
+            found[shortcode] = {"likes": int(likes), "comments": int(comments or 0)}
+            taken_at = payload.get("taken_at") or payload.get("taken_at_timestamp")
+            if taken_at:
+                found[shortcode]["taken_at"] = int(taken_at)
+
+        for value in payload.values():
+            if isinstance(value, (dict, list)):
+                extract_post_engagement(value, found)
+    elif isinstance(payload, list):
+        for value in payload:
+            extract_post_engagement(value, found)
+
+    return found
+
+def parse_engagement_bodies(bodies, found=None):
+    """Collect post engagement from raw response bodies."""
+    if found is None:
+        found = {}
+    for body in bodies:
+        # Some endpoints prefix their JSON with an anti-hijacking guard
+        if body.startswith("for (;;);"):
+            body = body[len("for (;;);"):]
+        try:
+            extract_post_engagement(json.loads(body), found)
+        except ValueError:
+            continue
+    return found
+
+@track_phase(items=len)
+def scrape_engagement_from_network(driver, post_urls):
+    """
+    Drop-in replacement for scrape_engagement_by_hover that reads likes and
+    comments from the responses captured while the grid loaded. Posts that
+    never showed up in the traffic (e.g. rendered into the initial HTML) are
+    hovered as before.
+    """
+    engagement = parse_engagement_bodies(take_response_bodies(driver))
+    return engagement_with_hover_fallback(driver, post_urls, engagement)
+
+@track_phase(items=len)
+def scrape_engagement_over_http(driver, post_urls, workers=None, base_url=INSTAGRAM_BASE_URL):
+    """
+    Drop-in replacement for scrape_engagement_by_hover that requests each
+    post's metadata directly (see post_fetcher), reusing the browser's
+    cookies, with up to `workers` requests in flight. Posts whose request
+    fails are hovered as before.
+    """
+    payloads = fetch_post_metadata(
+        post_urls, export_session_cookies(driver), workers=workers or http_fetch_workers, base_url=base_url
+    )
+    engagement = {}
+    for payload in payloads.values():
+        if payload is not None:
+            extract_post_engagement(payload, engagement)
+    return engagement_with_hover_fallback(driver, post_urls, engagement)
+
+def engagement_with_hover_fallback(driver, post_urls, engagement):
+    """
+    Build the likes_comments list for post_urls from {shortcode: counts},
+    hovering only the posts that have no counts.
+    """
+    by_url = {}
+    missing = []
+    for post_url in post_urls:
+        counts = engagement.get(post_shortcode(post_url))
+        if counts is None:
+            missing.append(post_url)
         else:
-            return int(text.replace(",", ""))
-    except ValueError:
-        return 0
+            by_url[post_url] = {"url": post_url, **counts}
+
+    print(f"Engagement found for {len(by_url)} posts, {len(missing)} left to hover")
+    if missing:
+        for item in scrape_engagement_by_hover(driver, missing):
+            by_url[item["url"]] = item
+
+    return [by_url[post_url] for post_url in post_urls]
+
+def convert_to_number(text):
+    """Parse one count string ("1,234", "1.2K", "1,2K", "3M"); see parse_counts."""
+    return int(parse_counts([text])[0])
 
 def calculate_average_engagement(likes_comments):
     """
@@ -174,122 +503,388 @@ def calculate_average_engagement(likes_comments):
     average_engagement = (total_likes + total_comments) / total_posts
     return average_engagement
 
-def scrape_instagram_user_info(driver, profile_url, target_post_count):
+# Classifies the open profile page and reads every header field in one call.
+# Polls until the page is recognisable (a missing/challenge page, a private
+# banner, or a header with its stats and avatar) or timeoutMs passes, then
+# resolves with {page_type, user name, user image, bio, stats}. The selectors
+# are the ones the per-field lookups used.
+READ_PROFILE_HEADER_JS = """
+var timeoutMs = arguments[0];
+var done = arguments[arguments.length - 1];
+var started = Date.now();
+
+function text(el) {
+    return el ? (el.innerText || el.textContent || "").trim() : null;
+}
+
+function pageType() {
+    var path = location.pathname;
+    if (path.indexOf("/challenge") === 0 || path.indexOf("/accounts/login") === 0
+        || path.indexOf("/accounts/suspended") === 0) {
+        return "challenge";
+    }
+    var body = text(document.body) || "";
+    if (body.indexOf("Sorry, this page isn't available") !== -1 || /Page not found/i.test(document.title)) {
+        return "missing";
+    }
+    var banner = document.querySelector(
+        "div[class*='xieb3on'] span[class*='x1lliihq x1plvlek xryxfnj x1n2onr6']"
+    );
+    // The body-text fallback only counts when there is no grid, so a bio can't trigger it
+    if ((banner && /this account is private/i.test(text(banner)))
+        || (/this account is private/i.test(body) && !document.querySelector("a[href*='/p/']"))) {
+        return "private";
+    }
+    return document.querySelector("header") ? "public" : null;
+}
+
+function snapshot(type) {
+    var stats = [];
+    var items = document.querySelectorAll("header ul li");
+    for (var i = 0; i < items.length && i < 3; i++) {
+        stats.push(text(items[i]).split(/\\s+/)[0]);
+    }
+    var image = document.querySelector("img[alt*='profile picture']");
+    var bio = document.querySelector("span[class*='_ap3a _aaco _aacu _aacx _aad7 _aade']");
+    return {
+        page_type: type,
+        "user name": text(document.querySelector("header h2")),
+        "user image": image ? image.getAttribute("src") : null,
+        bio: text(bio),
+        stats: stats
+    };
+}
+
+(function poll() {
+    var type = pageType();
+    var complete = type === "public"
+        && document.querySelectorAll("header ul li").length >= 3
+        && document.querySelector("img[alt*='profile picture']");
+    if ((type && type !== "public") || complete || Date.now() - started > timeoutMs) {
+        done(snapshot(type || "missing"));
+        return;
+    }
+    setTimeout(poll, 50);
+})();
+"""
+
+@track_phase()
+def read_profile_header(driver, timeout=7):
+    """
+    Read the open profile page in one round-trip. Returns a dict with
+    "page_type" ("public", "private", "missing" or "challenge") and the
+    header fields in the output's column names; missing fields get the same
+    placeholders the per-field lookups used.
+    """
+    header = driver.execute_async_script(READ_PROFILE_HEADER_JS, int(timeout * 1000))
+    stats = header.pop("stats") + ["N/A"] * 3
+    header["user name"] = header["user name"] or "N/A"
+    header["user image"] = header["user image"] or "N/A"
+    header["bio"] = header["bio"] or "No bio available"
+    header["number of posts"], header["number of followers"], header["number of following"] = stats[:3]
+    return header
+
+# --- Result cache -----------------------------------------------------------
+# Most profiles have no new posts between daily runs. The cache keeps, per
+# profile URL, the last header, the post links and each post's engagement
+# with the time it was read, so a rescrape only loads the newest grid batch
+# and refetches engagement for new or stale posts. Entries live in a sqlite
+# table keyed by profile URL, so each finished profile writes one row instead
+# of the whole cache.
+
+# One grid batch; also covers the up to three pinned posts above new ones
+CACHE_PEEK_POSTS = 12
+
+def open_result_cache(filename=result_cache_file):
+    """
+    Open (or create) the profile cache. Returns a connection shared by all
+    workers, or None if the file isn't a usable database.
+    """
     try:
-        # Open the Instagram profile
-        print(f"Navigating to profile: {profile_url}")
-        driver.get(profile_url)
+        cache = sqlite3.connect(filename, check_same_thread=False)
+        with cache:
+            cache.execute("CREATE TABLE IF NOT EXISTS profiles (url TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+        return cache
+    except sqlite3.DatabaseError as e:
+        print(f"Ignoring unreadable cache file {filename}: {e}")
+        return None
 
-        # Wait for the profile page to load
-        wait = WebDriverWait(driver, 7)
-        wait.until(EC.presence_of_element_located((By.XPATH, "//header")))
-        print("Profile page loaded.")
+def get_cached_profile(cache, profile_url):
+    """Cached entry of one profile: {"cached_at", "user_info", "posts", "engagement"}, or None."""
+    with result_cache_lock:
+        row = cache.execute("SELECT entry FROM profiles WHERE url = ?", (profile_url,)).fetchone()
+    return json.loads(row[0]) if row else None
 
-        time.sleep(3)
-        try:
-            priv_element = driver.find_element(By.XPATH, "//div[contains(@class, 'xieb3on')]//span[contains(@class, 'x1lliihq x1plvlek xryxfnj x1n2onr6')]")
- 
-            # Check if the private profile message is present
-            if "This Account is Private".lower() in priv_element.text.lower():
-                print(f"Private profile: {profile_url}. Skipping...")
-                return None
-        except Exception as e:
-            # If the element is not found, continue scraping as it's not a private profile
-            print(f"No private profile message found for {profile_url}. Continuing...")
+def put_cached_profile(cache, profile_url, entry):
+    """Insert or replace one profile's entry; committed at once, so a crash keeps it."""
+    with result_cache_lock, cache:
+        cache.execute("INSERT OR REPLACE INTO profiles (url, entry) VALUES (?, ?)",
+                      (profile_url, json.dumps(entry)))
 
-        user_info = {}
+def load_posts_with_cache(driver, target_post_count, cached, post_delta, fresh=None):
+    """
+    Load the post links, reusing the cached list when possible: only enough
+    posts to cover the new ones (plus one batch) are loaded, and the rest are
+    taken from the cache as long as the two lists overlap.
 
-        # Username
-        try:
-            print("Extracting username...")
-            username_element = driver.find_element(By.XPATH, "//header//h2")
-            user_info["user name"] = username_element.text
-            print(f"Username: {user_info['user name']}")
-        except Exception as e:
-            print(f"Error extracting username: {e}")
-            user_info["user name"] = "N/A"
+    fresh is the set of cached links whose engagement is still valid. When
+    given, the cached tail is only reused if all of it is fresh; otherwise
+    the whole grid is loaded, since stale posts have to be in the page to be
+    read again. None means engagement doesn't need the page (http).
+    """
+    if cached and 0 <= post_delta < target_post_count:
+        peek = min(target_post_count, post_delta + CACHE_PEEK_POSTS)
+        newest = scroll_to_load_posts(driver, peek)
+        if len(newest) < peek or newest[-1] in cached["posts"]:
+            merged = (newest + [post for post in cached["posts"] if post not in newest])[:target_post_count]
+            reused = merged[len(newest):]
+            if fresh is None or all(post in fresh for post in reused):
+                print(f"Reused {len(reused)} cached post links")
+                return merged
+            print("Cached posts have stale engagement, loading the whole grid")
+        else:
+            print("Newest posts don't overlap the cached list, loading the whole grid")
 
-        # Profile Image
-        try:
-            print("Extracting profile image...")
-            profile_image_element = wait.until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//img[contains(@alt, 'profile picture')]")
-                )
-            )
-            user_info["user image"] = profile_image_element.get_attribute("src")
-            print(f"Profile image: {user_info['user image']}")
-        except Exception as e:
-            print(f"Error extracting profile image: {e}")
-            user_info["user image"] = "N/A"
+    return scroll_to_load_posts(driver, target_post_count)
 
-        # Bio
-        try:
-            bio_element = driver.find_element(By.XPATH, "//span[contains(@class, '_ap3a _aaco _aacu _aacx _aad7 _aade')]")
-            user_info["bio"] = bio_element.text
-        except Exception:
-            user_info["bio"] = "No bio available"
+@profile_target(lambda driver, profile_url, *args: profile_url)
+@track_phase(items=lambda result: 1)
+def scrape_instagram_user_info(driver, profile_url, target_post_count, cache=None,
+                               cache_ttl=result_cache_ttl):
+    """
+    Scrape one profile. With a cache (see open_result_cache), a profile
+    read within cache_ttl seconds whose post count and newest grid batch
+    haven't changed is answered from the cache; otherwise only new posts and posts
+    with stale engagement are fetched, and the profile's entry is rewritten.
+    """
+    try:
+        # Open the Instagram profile
+        print(f"Navigating to profile: {profile_url}")
+        if engagement_source == "network":
+            # Start the capture clean so the previous profile's responses don't linger
+            take_network_log(driver)
+        driver.get(profile_url)
 
-        # Posts, Followers, Following
-        try:
-            print("Extracting stats (posts, followers, following)...")
-            stats_elements = driver.find_elements(By.XPATH, "//header//ul/li")
-            user_info["number of posts"] = stats_elements[0].text.split(" ")[0]
-            user_info["number of followers"] = stats_elements[1].text.split(" ")[0]
-            user_info["number of following"] = stats_elements[2].text.split(" ")[0]
-            print(f"Stats - Posts: {user_info['number of posts']}, Followers: {user_info['number of followers']}, Following: {user_info['number of following']}")
-        except Exception as e:
-            print(f"Error extracting stats: {e}")
-            user_info["number of posts"] = "N/A"
-            user_info["number of followers"] = "N/A"
-            user_info["number of following"] = "N/A"
+        # Classify the page and read the whole header in one call
+        header = read_profile_header(driver)
+        page_type = header.pop("page_type")
+        if page_type == "private":
+            print(f"Private profile: {profile_url}. Skipping...")
+            return None
+        if page_type == "missing":
+            print(f"Profile not found: {profile_url}. Skipping...")
+            return None
+        if page_type == "challenge":
+            print(f"Instagram asked for a login or challenge on {profile_url}. Skipping...")
+            return None
+        print("Profile page loaded.")
+
+        user_info = header
+        user_info["profile url"] = profile_url
+        print(f"Username: {user_info['user name']}")
+        print(f"Profile image: {user_info['user image']}")
+        print(f"Stats - Posts: {user_info['number of posts']}, Followers: {user_info['number of followers']}, Following: {user_info['number of following']}")
+
+        now = time.time()
+        cached = get_cached_profile(cache, profile_url) if cache is not None else None
+        post_delta = -1
+        # Engagement read within the TTL is reused; only new or stale posts are fetched
+        known = {}
+        if cached:
+            post_delta = (convert_to_number(user_info["number of posts"])
+                          - convert_to_number(cached["user_info"]["number of posts"]))
+            # Posts whose hover failed have no cached engagement, so their
+            # entry isn't complete enough to answer from
+            complete = all(post in cached["engagement"] for post in cached["posts"])
+            if post_delta == 0 and complete and now - cached["cached_at"] < cache_ttl:
+                # The count misses a post deleted and another added, so the
+                # newest grid batch has to match the cached links too
+                peek = min(target_post_count, CACHE_PEEK_POSTS)
+                try:
+                    newest = scroll_to_load_posts(driver, peek)
+                except Exception as e:
+                    print(f"Error while checking the newest posts: {e}")
+                    newest = None
+                if newest == cached["posts"][:peek]:
+                    print(f"No new posts since {datetime.fromtimestamp(cached['cached_at'])}, using cached results")
+                    user_info["last 50 posts"] = cached["posts"]
+                    for column in ["average engagement"] + ANALYTICS_COLUMNS:
+                        user_info[column] = cached["user_info"].get(column, "")
+                    return user_info
+                print("Newest posts differ from the cached ones, scraping the profile again")
+            known = {
+                url: item for url, item in cached["engagement"].items()
+                if now - item["fetched_at"] < cache_ttl
+            }
 
         # Last 50 Posts
         posts = []
+        posts_failed = False
         try:
             print("Scrolling to load posts...")
-            time.sleep(3)
             print(f"target posts: {target_post_count}")
-            posts = scroll_to_load_posts(driver, target_post_count)
+            # Hover and network read engagement from the page, so stale cached posts must be loaded
+            fresh = None if engagement_source == "http" else set(known)
+            posts = load_posts_with_cache(driver, target_post_count, cached, post_delta, fresh)
 
             print(f"Total Posts Loaded: {len(posts)}")
             print(f"Last 50 Posts: {posts}")
         except Exception as e:
             print(f"Error while extracting posts: {e}")
             posts = []
+            posts_failed = True
 
         user_info["last 50 posts"] = posts
 
-        # Scrape engagement details using hover
-        print("Scraping engagement details using hover...")
-        likes_comments = scrape_engagement_by_hover(driver, posts)
+        to_fetch = [post for post in posts if post not in known]
+        print(f"Engagement cached for {len(posts) - len(to_fetch)} posts, fetching {len(to_fetch)}")
+
+        if not to_fetch:
+            fetched = []
+        elif engagement_source == "network":
+            print("Reading engagement details from captured responses...")
+            fetched = scrape_engagement_from_network(driver, to_fetch)
+        elif engagement_source == "http":
+            print("Fetching engagement details over HTTP...")
+            fetched = scrape_engagement_over_http(driver, to_fetch)
+        else:
+            # Scrape engagement details using hover
+            print("Scraping engagement details using hover...")
+            fetched = scrape_engagement_by_hover(driver, to_fetch)
+
+        failed = set()
+        for item in fetched:
+            known[item["url"]] = {
+                "likes": item["likes"], "comments": item["comments"],
+                "taken_at": item.get("taken_at"), "fetched_at": now
+            }
+            if item.get("failed"):
+                failed.add(item["url"])
+        likes_comments = [
+            {"url": post, "likes": known[post]["likes"], "comments": known[post]["comments"],
+             "taken_at": known[post].get("taken_at")}
+            for post in posts if post in known
+        ]
 
         # Calculate average engagement
         average_engagement = calculate_average_engagement(likes_comments)
         user_info["average engagement"] = round(average_engagement, 2)
         print(f"Average Engagement: {user_info['average engagement']}")
 
+        # Median, percentiles, engagement rate and posting cadence
+        user_info.update(profile_analytics(likes_comments, user_info["number of followers"]))
+
+        # An empty post list from a failed load would otherwise be served for a whole TTL
+        if cache is not None and not posts_failed:
+            put_cached_profile(cache, profile_url, {
+                "cached_at": now,
+                "user_info": {key: value for key, value in user_info.items() if key != "last 50 posts"},
+                "posts": posts,
+                # Failed hovers are left out, so the next run tries them again
+                "engagement": {post: known[post] for post in posts if post in known and post not in failed}
+            })
+
         return user_info
 
     except Exception as e:
         print(f"Error during scraping: {e}")
         return None
 
-def save_to_csv(data, output_file="instagram_data.csv"):
+# --- Job input ------------------------------------------------------------------
+
+def normalize_profile_url(line):
+    """
+    Turn one input line (a profile URL, "@name" or a bare username) into a
+    canonical profile URL. Blank lines and "#" comments give None.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    match = re.match(r"(?:https?://)?(?:www\.)?instagram\.com/([^/?#]+)", line)
+    username = match.group(1) if match else line.lstrip("@")
+    return f"{INSTAGRAM_HOME_URL}{username.lower()}/"
+
+def iter_profile_urls(lines, offset=0, skip=()):
+    """
+    Stream profile URLs from an iterable of lines (a file or sys.stdin),
+    starting at line `offset`. Duplicates and URLs in `skip` (profiles
+    already in the output) are dropped, so nothing is held but the set of
+    URLs seen.
+    """
+    seen = set(skip)
+    for line_number, line in enumerate(lines):
+        if line_number < offset:
+            continue
+        url = normalize_profile_url(line)
+        if url and url not in seen:
+            seen.add(url)
+            yield url
+
+def load_completed_profiles(output_file, columns=CSV_COLUMNS):
+    """
+    Return the profile URLs already written to a streamed CSV, so a
+    restarted job can skip them. Raises if the file was written with a
+    different column set, since appending to it would misalign rows.
+    """
+    if not os.path.exists(output_file):
+        return set()
+    with open_csv_stream(output_file, "r") as csvfile:
+        reader = csv.DictReader(csvfile)
+        if reader.fieldnames != columns:
+            raise Exception(f"{output_file} has different columns; delete it or pass --restart")
+        return {row["profile url"] for row in reader if row.get("profile url")}
+
+def open_csv_stream(output_file, mode="a"):
     """
-    Saves the scraped data to a CSV file.
+    Open a text stream for CSV rows. Compression follows the extension:
+    '.gz' uses gzip, '.zst' uses zstandard (optional dependency).
     """
-    if not data:
-        print("No data to save.")
+    if output_file.endswith(".gz"):
+        return gzip.open(output_file, mode + "t", newline="", encoding="utf-8")
+    if output_file.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required for .zst output (pip install zstandard)")
+        raw = open(output_file, mode + "b")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, newline="", encoding="utf-8")
+    return open(output_file, mode, newline="", encoding="utf-8")
+
+def start_csv(output_file, columns=CSV_COLUMNS):
+    """Create (or truncate) a streaming CSV output and write its header."""
+    with open_csv_stream(output_file, "w") as csvfile:
+        csv.DictWriter(csvfile, fieldnames=columns).writeheader()
+
+def append_csv_row(output_file, row, columns=CSV_COLUMNS):
+    """
+    Append one profile to the CSV as soon as it's scraped. The file is
+    reopened per row, so everything written so far survives a crash.
+    Missing keys are left blank and unknown keys are dropped.
+    """
+    with output_lock:
+        with open_csv_stream(output_file, "a") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=columns, restval="", extrasaction="ignore")
+            writer.writerow(row)
+
+def finalize_csv(stream_file, output_file="instagram_data.csv"):
+    """Copy a streamed CSV (decompressing .gz/.zst) into a plain CSV file."""
+    if stream_file == output_file:
         return
+    with open_csv_stream(stream_file, "r") as source, open(output_file, "w", newline="", encoding="utf-8") as target:
+        for line in source:
+            target.write(line)
 
-    keys = data[0].keys()
-    with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=keys)
-        writer.writeheader()
-        writer.writerows(data)
+def configure_driver(user_data_dir=None, debugging_port=9222, headless=browser_headless,
+                     window_size=browser_window_size, block_resources=browser_block_resources):
+    """
+    Concurrent browsers on one host each need their own debugging_port
+    and user_data_dir.
 
-def configure_driver():
+    headless, window_size ("W,H") and block_resources give the lean profile:
+    no window, and no image/media/font/analytics downloads.
+    """
     options = Options()
     
     options.add_argument("--disable-blink-features=AutomationControlled")
@@ -297,11 +892,36 @@ def configure_driver():
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-gpu")
-    options.add_argument("--remote-debugging-port=9222")
-    options.add_argument("--start-maximized")
+    options.add_argument(f"--remote-debugging-port={debugging_port}")
+    if headless:
+        options.add_argument("--headless=new")
+        # Headless windows default to 800x600, which collapses desktop layouts
+        window_size = window_size or "1920,1080"
+    if window_size:
+        options.add_argument(f"--window-size={window_size}")
+    else:
+        options.add_argument("--start-maximized")
+    if block_resources:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
     options.add_argument("--lang=en-US")
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
     options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
     options.add_experimental_option("useAutomationExtension", False)
+    perf_logging_prefs = {}
+    if scraper_common.profiling_dir:
+        # chromedriver records these trace categories into the performance log
+        perf_logging_prefs["traceCategories"] = TRACE_CATEGORIES
+    if engagement_source == "network":
+        # ...and the grid's XHR/GraphQL responses for the engagement capture
+        perf_logging_prefs["enableNetwork"] = True
+    if perf_logging_prefs:
+        # chromedriver logs Network and Page events unless told otherwise;
+        # nothing reads them when only profiling
+        perf_logging_prefs.setdefault("enableNetwork", False)
+        perf_logging_prefs["enablePage"] = False
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", perf_logging_prefs)
     
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
     
@@ -317,44 +937,173 @@ def configure_driver():
         window.chrome = { runtime: {} };
         """
     })
+
+    if block_resources:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    if engagement_source == "network":
+        enable_network_capture(driver)
+    instrument_driver(driver)
     
     return driver
 
+def scrape_profiles_parallel(profile_urls, accounts, target_post_count, workers=1,
+                             sessions_per_account=2, base_port=9222, user_data_dir=None,
+                             sink=None, profile_delay=5, cache=None):
+    """
+    Spread profile_urls across a pool of logged-in Chrome instances.
+    Returns the scraped user_info dicts (private/failed profiles are dropped).
+
+    accounts is a list of (username, password). Each account logs in once
+    (or restores its saved session, see ensure_logged_in); its cookie jar is
+    loaded into every other browser assigned to it, and no account is used by more than `sessions_per_account`
+    browsers at a time, so the pool is capped at
+    len(accounts) * sessions_per_account workers.
+
+    If a sink callable is given, finished profiles go through a results
+    queue to a single writer thread that calls sink(user_info), so browsers
+    never wait on output; they are not kept in the returned list.
+
+    With a cache (see open_result_cache), unchanged profiles are served
+    from it and each scraped profile's entry is written as it finishes.
+    """
+    workers = max(1, min(workers, len(accounts) * sessions_per_account))
+    print(f"Scraping profiles with {workers} worker(s) on {len(accounts)} account(s)")
+
+    cookie_jars = {}
+    login_locks = [threading.Lock() for _ in accounts]
+
+    def make_driver(slot):
+        # Round-robin, so each account ends up with at most sessions_per_account browsers
+        account = slot % len(accounts)
+        username, password = accounts[account]
+        worker_dir = os.path.join(user_data_dir, f"worker-{slot}") if user_data_dir else None
+        driver = configure_driver(user_data_dir=worker_dir, debugging_port=base_port + slot)
+        try:
+            with login_locks[account]:
+                print(f"Worker {slot}: signing in as {username}")
+                cookie_jars[account] = ensure_logged_in(driver, username, password, cookie_jars.get(account))
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    results_queue = queue.Queue()
+
+    def write_results():
+        while True:
+            user_data = results_queue.get()
+            if user_data is None:
+                break
+            try:
+                sink(user_data)
+            except Exception as e:
+                print(f"Failed to write profile: {e}")
+
+    writer = None
+    if sink is not None:
+        writer = threading.Thread(target=write_results, daemon=True)
+        writer.start()
+
+    def scrape(driver, url):
+        print(f"Scraping: {url}")
+        user_data = scrape_instagram_user_info(driver, url, target_post_count, cache)
+        if user_data and writer is not None:
+            results_queue.put(user_data)
+        time.sleep(profile_delay)
+        return None if writer is not None else user_data
+
+    try:
+        results = run_with_driver_pool(scrape, profile_urls, workers, make_driver)
+    finally:
+        if writer is not None:
+            results_queue.put(None)
+            writer.join()
+    return results
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Instagram profiles")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each profile URL (Python samples + Chrome trace)")
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument("--input", default=os.getenv("INSTAGRAM_PROFILES_FILE"),
+                        help="file with one profile URL or username per line ('-' for stdin)")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="skip this many input lines (resume a long list)")
+    parser.add_argument("--restart", action="store_true",
+                        help="start a new output file instead of skipping profiles already in it")
+    args = parser.parse_args()
+    if args.profile:
+        scraper_common.profiling_dir = args.profile_dir
+
     # Provide your username/password in a .env file or enter below.
     insta_email = os.getenv("INSTAGRAM_USERNAME") or ""
     insta_password = os.getenv("INSTAGRAM_PASSWORD") or ""
+    # Extra accounts to spread the workers over: "user1:pass1,user2:pass2"
+    extra_accounts = [
+        tuple(account.split(":", 1))
+        for account in (os.getenv("INSTAGRAM_EXTRA_ACCOUNTS") or "").split(",") if ":" in account
+    ]
+    sessions_per_account = int(os.getenv("INSTAGRAM_SESSIONS_PER_ACCOUNT") or 2)
     target_post_count = int(os.getenv("TARGET_POST_COUNT") or 50)
+    scraper_workers = int(os.getenv("SCRAPER_WORKERS") or 1)
+    # Rows are streamed to their own file and copied into instagram_data.csv
+    # at the end, so an existing instagram_data.csv never blocks a run
+    output_stream_file = os.getenv("INSTAGRAM_OUTPUT_STREAM") or "instagram_data.stream.csv"
 
     profile_urls = [
         "https://www.instagram.com/dualipa/",
-    ] # add more profile urls to scrap
+    ] # add more profile urls to scrap, or pass --input
 
-    driver = configure_driver()
+    print("Logging in...")
+    if not (insta_email and insta_password):
+        raise Exception("Invalid credentials provided.")
 
-    try:
-        print("Logging in...")
-        if insta_email and insta_password:
-            login_instagram(driver, insta_email, insta_password)
-        else:
-            raise Exception("Invalid credentials provided.")
-            
-        time.sleep(5)
+    # Each profile is appended to the output as soon as it's scraped; a
+    # restarted job keeps the file and skips the profiles already in it
+    if args.restart or not os.path.exists(output_stream_file):
+        start_csv(output_stream_file)
+        completed = set()
+    else:
+        completed = load_completed_profiles(output_stream_file)
+        print(f"Resuming: {len(completed)} profiles already in {output_stream_file}")
+    scraped_count = len(completed)
 
-        all_user_data = []
-        for url in profile_urls:
-            print(f"Scraping: {url}")
-            user_data = scrape_instagram_user_info(driver, url, target_post_count)
-            if user_data:
-                all_user_data.append(user_data)
-            time.sleep(5)
-
-        if all_user_data:
-            save_to_csv(all_user_data)
-            print("Data saved to 'instagram_data.csv'")
-        else:
-            print("No data scraped.")
+    if args.input == "-":
+        input_lines = sys.stdin
+    elif args.input:
+        input_lines = open(args.input, "r", encoding="utf-8")
+    else:
+        input_lines = profile_urls
 
+    def write_profile(user_data):
+        global scraped_count
+        with output_lock:
+            append_csv_row(output_stream_file, user_data)
+            scraped_count += 1
+
+    result_cache = open_result_cache()
+    try:
+        scrape_profiles_parallel(
+            iter_profile_urls(input_lines, args.offset, completed),
+            [(insta_email, insta_password)] + extra_accounts, target_post_count,
+            workers=scraper_workers, sessions_per_account=sessions_per_account, sink=write_profile,
+            cache=result_cache
+        )
     finally:
-        driver.quit()
+        if result_cache is not None:
+            result_cache.close()
+
+    if scraped_count:
+        finalize_csv(output_stream_file)
+        print("Data saved to 'instagram_data.csv'")
+    else:
+        print("No data scraped.")
+
+    save_metrics(
+        os.getenv("INSTAGRAM_METRICS_JSON") or "instagram_metrics.json",
+        os.getenv("INSTAGRAM_METRICS_PROM") or "instagram_metrics.prom",
+        "instagram"
+    )
 
@@ -0,0 +1,83 @@
+"""
+Browserless fetcher for Instagram post metadata.
+
+Once a browser has logged in and collected post links, per-post data doesn't
+need the browser: the same media-info endpoint the web app calls can be
+requested directly with the browser's cookies. Requests go out on a thread
+pool over one pooled urllib3 client (installed with selenium), so
+connections are kept alive and at most `workers` requests are in flight.
+
+    payloads = fetch_post_metadata(post_urls, driver.get_cookies(), workers=8)
+
+base_url points the fetcher at another host, e.g. a local stand-in server.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+import urllib3
+
+INSTAGRAM_BASE_URL = "https://www.instagram.com"
+
+# Public app id the Instagram web client sends with every API call
+INSTAGRAM_APP_ID = "936619743392459"
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
+
+SHORTCODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+def shortcode_to_media_id(shortcode):
+    """Decode a post shortcode (the /p/<shortcode>/ part) into its numeric media id."""
+    media_id = 0
+    for char in shortcode:
+        media_id = media_id * 64 + SHORTCODE_ALPHABET.index(char)
+    return media_id
+
+def post_shortcode(post_url):
+    return post_url.rstrip("/").split("/")[-1]
+
+def request_headers(cookies):
+    """Headers for API calls made on behalf of a browser session."""
+    jar = {cookie["name"]: cookie["value"] for cookie in cookies}
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json",
+        "X-IG-App-ID": INSTAGRAM_APP_ID,
+        "X-Requested-With": "XMLHttpRequest",
+    }
+    if jar:
+        headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in jar.items())
+    if "csrftoken" in jar:
+        headers["X-CSRFToken"] = jar["csrftoken"]
+    return headers
+
+def fetch_post_metadata(post_urls, cookies, workers=8, timeout=10, base_url=INSTAGRAM_BASE_URL):
+    """
+    Request /api/v1/media/<id>/info/ for every post URL, `workers` at a
+    time. Returns {post_url: decoded JSON}, with None for posts whose
+    request failed after retries.
+    """
+    pool = urllib3.PoolManager(
+        maxsize=workers,
+        block=True,
+        headers=request_headers(cookies),
+        timeout=urllib3.Timeout(total=timeout),
+        retries=urllib3.Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+    )
+
+    def fetch(post_url):
+        try:
+            media_id = shortcode_to_media_id(post_shortcode(post_url))
+            response = pool.request("GET", f"{base_url}/api/v1/media/{media_id}/info/")
+            if response.status != 200:
+                print(f"Metadata request for {post_url} returned {response.status}")
+                return None
+            return json.loads(response.data)
+        except (urllib3.exceptions.HTTPError, ValueError) as e:
+            print(f"Metadata request for {post_url} failed: {e}")
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return dict(zip(post_urls, executor.map(fetch, post_urls)))
+    finally:
+        pool.clear()